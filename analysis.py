@@ -2,7 +2,8 @@
 
 from math import pi, radians
 
-from transformation import Line, Plane
+from transformation import (Line, Plane, LineArray, RotationMatrix,
+                            DirectionCosinesSum)
 from grouping import DataGroup
 
 
@@ -17,21 +18,11 @@ def average(iterable):
     return iter_sum / iter_length
 
 
-def sum_iterable(iterable):
-    '''Sum an iterable.'''
-    iterable = iter(iterable)
-    value = next(iterable)
-    for i in iterable:
-        value += i
-    return value
-
-
 def planes_to_poles(planes):
     '''Convert a DataGroup of Planes to poles of Planes.'''
     out_group = DataGroup(planes.name.get() + ' (poles)', Line,
                           enabled=planes.enabled.get())
-    for plane in planes.net_objects():
-        out_group.add_net_object(plane.pole())
+    out_group.add_net_objects(plane.pole() for plane in planes.net_objects())
     return out_group
 
 
@@ -39,8 +30,8 @@ def poles_to_planes(poles):
     '''Convert a DataGroup of poles of Planes to Planes.'''
     out_group = DataGroup(poles.name.get() + ' (planes)', Plane,
                           enabled=poles.enabled.get())
-    for pole in poles.net_objects():
-        out_group.add_net_object(Plane.from_pole(pole))
+    out_group.add_net_objects(Plane.from_pole(pole)
+                              for pole in poles.net_objects())
     return out_group
 
 
@@ -67,15 +58,22 @@ class Fold:
         '''Compute the strike of the best-fit profile plane.'''
         poles_dir_cos = [p.direction_cosines() for p in self.poles]
         poles_dir_cos.sort(key=lambda c: c.down, reverse=True)
-        avg_pole = Line.from_direction_cosines(sum_iterable(poles_dir_cos))
-        seen, differences = [], []
-        for pole in poles_dir_cos:
-            seen.append(pole)
-            differences.extend(p - pole for p in poles_dir_cos if p not in seen)
+        avg_pole = Line.from_direction_cosines(
+            DirectionCosinesSum(poles_dir_cos).total())
         positive_diff_dir = Line(0, avg_pole.trend - pi/2).direction_cosines()
-        return Line.from_direction_cosines(sum_iterable(
-            diff if positive_diff_dir.dot_product(diff) >= 0 else -diff
-            for diff in differences)).trend
+        # Sum differences between all pairs of poles in place, flipping them
+        # so they all point in the positive direction.
+        seen, diff_sum = set(), DirectionCosinesSum()
+        for pole in poles_dir_cos:
+            seen.add(pole)
+            for other in poles_dir_cos:
+                if other not in seen:
+                    diff = other - pole
+                    if positive_diff_dir.dot_product(diff) >= 0:
+                        diff_sum += diff
+                    else:
+                        diff_sum -= diff
+        return Line.from_direction_cosines(diff_sum.total()).trend
 
     def profile_plane_dip(self, strike=None, increment=radians(.1)):
         '''Compute the dip of the best-fit profile plane, given a strike.
@@ -85,16 +83,15 @@ class Fold:
         if strike is None:
             strike = self.profile_plane_strike()
 
-        def is_left_of_plane(axis, dip):
-            return lambda pole: pole.rotate_around(axis, dip) \
-                                    .direction_cosines().east < 0
-
+        poles = LineArray.from_items(self.poles).direction_cosines()
         half_points = int(round(len(self.poles) / 2))
         possible_dips = []
         axis, dip = Line(0, strike), -pi/2
         while dip <= pi/2:
-            below_best_fit = filter(is_left_of_plane(axis, dip), self.poles)
-            if sum(1 for _ in below_best_fit) == half_points:
+            # Poles left of the plane end up with a negative east component.
+            rotated = RotationMatrix.around(axis, dip) \
+                                    .apply_array(poles, lower_hemisphere=True)
+            if sum(1 for east in rotated.east if east < 0) == half_points:
                 possible_dips.append(dip)
             dip += increment
 
@@ -113,8 +110,9 @@ class Fold:
         if not profile_plane:
             profile_plane = self.profile_plane()
         # Rotate poles so they are in a cluster elongate north to south.
-        ns_dircos = [pole.rotate_around(Line(pi/2, 0), -profile_plane.strike)
-                     .direction_cosines() for pole in self.poles]
+        rotation = RotationMatrix.around(Line(pi/2, 0), -profile_plane.strike)
+        ns_dircos = list(rotation.rotate(LineArray.from_items(self.poles))
+                         .direction_cosines())
         # reverse=True sorts poles north to south.
         ns_dircos.sort(key=lambda c: c.north, reverse=True)
         cutoff = int(round(self.top_limb_proportion * len(self.poles)))
@@ -7,16 +7,41 @@ import os.path
 import json
 import tkinter as tk
 from tkinter import ttk, filedialog
-from math import pi, radians
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from math import radians
+from multiprocessing import get_context
 
 import analysis
-from stereonets import EqualAngle, EqualArea
+from stereonets import (EqualAngle, EqualArea, ProjectionCache,
+                         RedrawScheduler)
 from transformation import Line, Plane
+from projections import PROJECTIONS
+from render import export_net
 from grouping import DataGroup
 from serialize import stereonet_object_encoder, stereonet_object_decoder
 from ui import StereonetInput
 
 
+def group_tag(group):
+    '''Get the canvas tag that all net objects of a group are plotted with.'''
+    return 'group-{}'.format(id(group))
+
+
+def resolved_colours(widget, options):
+    '''Copy canvas item options, with colours resolved to #rrggbb by Tk.
+
+    This lets render draw any colour that Tk knows, even without Tk.
+    '''
+    resolved = dict(options)
+    for name, value in options.items():
+        if name.endswith(('fill', 'outline')) and value:
+            # winfo_rgb returns 16 bits per channel.
+            resolved[name] = '#{:02x}{:02x}{:02x}'.format(
+                *(channel >> 8 for channel in widget.winfo_rgb(value)))
+    return resolved
+
+
 class StereonetApp(ttk.Frame):  # pylint: disable=too-many-ancestors
     '''Main Tk Frame for the stereonet application.'''
 
@@ -46,6 +71,14 @@ class StereonetApp(ttk.Frame):  # pylint: disable=too-many-ancestors
            .grid(row=0, column=0, sticky=tk.NSEW)
 
         self._stereonets = []
+        # Both nets share one cache of curves, so re-enabling a group of planes
+        # is cheap.
+        self._projection_cache = ProjectionCache()
+        # Plotting waits for Tk to be idle, so many changes are drawn at once.
+        self._redraw = RedrawScheduler(self, progress=self._redraw_progress)
+        self._status_before_redraw = None
+        # Groups whose net objects are on the nets, even if hidden.
+        self._plotted_groups = set()
         self._setup_stereonets(stereonet_size)
 
         self.data_groups = []
@@ -78,6 +111,7 @@ class StereonetApp(ttk.Frame):  # pylint: disable=too-many-ancestors
         for net in self._stereonets:
             for event in '<Enter>', '<Leave>':
                 net.bind_netobject(event, self._net_object_handler)
+            net.bind_selection(self._net_selection_handler)
 
     def _setup_menus_and_toolbars(self):
         '''Create and populate the main menu and toolbar.'''
@@ -166,8 +200,7 @@ class StereonetApp(ttk.Frame):  # pylint: disable=too-many-ancestors
         fold = analysis.Fold(netobjs)
         group = DataGroup(cur_group.name.get() + ' (fold analysis)', Plane,
                           enabled=cur_group.enabled.get())
-        group.add_net_object(fold.profile_plane())
-        group.add_net_object(fold.axial_plane())
+        group.add_net_objects((fold.profile_plane(), fold.axial_plane()))
         self.add_group(group)
 
     def _poles_from_to_planes(self):
@@ -184,18 +217,21 @@ class StereonetApp(ttk.Frame):  # pylint: disable=too-many-ancestors
         stereonets.enable_traversal()
         nb_tab_opts = {'underline': 7, 'sticky': tk.NSEW}
 
-        self._stereonets.append(EqualArea(stereonets, size=size))
+        net_opts = {'size': size, 'projection_cache': self._projection_cache}
+        self._stereonets.append(EqualArea(stereonets, **net_opts))
         stereonets.add(self._stereonets[-1], text='Equal Area', **nb_tab_opts)
-        self._stereonets.append(EqualAngle(stereonets, size=size))
+        self._stereonets.append(EqualAngle(stereonets, **net_opts))
         stereonets.add(self._stereonets[-1], text='Equal Angle', **nb_tab_opts)
 
         for net in self._stereonets:
-            for lat in range(-90, 91, 10):
-                net.plot_latitude_guide(radians(lat))
-            for dip in range(0, 90, 10):
-                for left_hemisphere in True, False:
-                    net.plot_dip_guide(radians(dip), left_hemisphere)
-            net.plot_dip_guide(pi / 2)
+            net.plot_guides(radians(10))
+
+        # Only the selected tab is kept up to date eagerly.
+        def update_visible_nets(_=None):
+            for net in self._stereonets:
+                self._redraw.set_visible(net, stereonets.select() == str(net))
+        stereonets.bind('<<NotebookTabChanged>>', update_visible_nets)
+        update_visible_nets()
 
     def _clear_all(self):
         '''Remove all plotted data and start over.'''
@@ -260,41 +296,72 @@ class StereonetApp(ttk.Frame):  # pylint: disable=too-many-ancestors
         if not dirname:
             self._status_message.set('Exporting cancelled.')
             return
+        # Draw SVG and PNG files from the groups' data rather than the
+        # canvases, so nets are drawn in parallel and without waiting for any
+        # redraws. Tk knows many more colour names than render does, so
+        # colours are resolved here.
+        groups = [(list(group.net_objects()),
+                   resolved_colours(self, group.style))
+                  for group in self.data_groups if group.enabled.get()]
         export_fnames = []
-        for i, net in enumerate(self._stereonets):
-            export_fnames.append(f'{dirname}/net{i}.eps')
-            net.postscript(x=0, y=0, width=net.size, height=net.size,
-                           file=export_fnames[-1])
+        # Fresh processes don't inherit Tk's state, unlike forked ones.
+        with ProcessPoolExecutor(mp_context=get_context('spawn')) as pool:
+            futures = [pool.submit(export_net, f'{dirname}/net{i}{extension}',
+                                   PROJECTIONS[net.projection_name], groups,
+                                   net.size)
+                       for i, net in enumerate(self._stereonets)
+                       for extension in ('.svg', '.png')]
+            # Meanwhile, write EPS files from the canvases, which must be up
+            # to date for that.
+            self._redraw.flush()
+            for i, net in enumerate(self._stereonets):
+                export_fnames.append(f'{dirname}/net{i}.eps')
+                net.postscript(x=0, y=0, width=net.size, height=net.size,
+                               file=export_fnames[-1])
+            export_fnames.extend(future.result() for future in futures)
         self._status_message.set(
             'Exported files ' + ', '.join(export_fnames) + '.')
 
     def add_group(self, group=None):
         '''Add a new group to the list of data groups.'''
-        def plot_group_netobjs(group):
-            for netobj in group.net_objects():
+        def show_group(group):
+            # Groups are only plotted once they are first shown, and after
+            # that, hidden and shown again in place.
+            enabled = group.enabled.get()
+            if group in self._plotted_groups:
                 for net in self._stereonets:
-                    if group.enabled.get():
-                        net.plot(netobj, **group.style)
-                    else:
-                        net.remove_net_object(netobj)
-                    net.update()
-        def unplot_group_item(group, netobj):
-            if group.enabled.get():
+                    self._redraw.call(net, net.set_tag_hidden,
+                                      group_tag(group), not enabled)
+            elif enabled:
+                self._plotted_groups.add(group)
                 for net in self._stereonets:
-                    net.remove_net_object(netobj)
-                    net.update()
-        def plot_group_item(group, netobj):
-            if group.enabled.get():
+                    self._redraw.plot(net, group.net_objects(),
+                                      tags=group_tag(group), **group.style)
+        def restyle_group(group):
+            if group in self._plotted_groups:
                 for net in self._stereonets:
-                    net.plot(netobj, **group.style)
-                    net.update()
+                    self._redraw.call(net, partial(
+                        net.restyle_tag, group_tag(group), **group.style))
+        def unplot_group_items(group, netobjs):
+            for netobj in netobjs:
+                self._projection_cache.invalidate(netobj)
+            if group in self._plotted_groups:
+                for net in self._stereonets:
+                    self._redraw.remove(net, netobjs)
+        def plot_group_items(group, netobjs):
+            if group in self._plotted_groups:
+                state = tk.NORMAL if group.enabled.get() else tk.HIDDEN
+                for net in self._stereonets:
+                    self._redraw.plot(net, netobjs, tags=group_tag(group),
+                                      state=state, **group.style)
 
         group = self._net_input.add_group(group)
-        group.bind(change_group_enabled=plot_group_netobjs,
-                   add_item=plot_group_item, remove_item=unplot_group_item,
+        group.bind(change_group_enabled=show_group,
+                   change_style=restyle_group, add_items=plot_group_items,
+                   remove_items=unplot_group_items,
                    remove_group=self.remove_group)
         self.data_groups.append(group)
-        plot_group_netobjs(group)
+        show_group(group)
         return group
 
     def remove_current_group(self):
@@ -310,6 +377,11 @@ class StereonetApp(ttk.Frame):  # pylint: disable=too-many-ancestors
                 return
         self._net_input.remove_group(group)
         self.data_groups.remove(group)
+        self._plotted_groups.discard(group)
+        for net in self._stereonets:
+            self._redraw.delete_tag(net, group_tag(group))
+        for netobj in group.net_objects():
+            self._projection_cache.invalidate(netobj)
 
     def _net_object_handler(self, event, net_object):
         if event.type == tk.EventType.Enter:
@@ -318,6 +390,18 @@ class StereonetApp(ttk.Frame):  # pylint: disable=too-many-ancestors
              self._status_message.get() == str(net_object):
             self._status_message.set('')
 
+    def _redraw_progress(self, done, total):
+        if self._status_before_redraw is None:
+            self._status_before_redraw = self._status_message.get()
+        if done < total:
+            self._status_message.set(f'Plotting... {done * 100 // total}%')
+        else:
+            self._status_message.set(self._status_before_redraw)
+            self._status_before_redraw = None
+
+    def _net_selection_handler(self, net_objects):
+        self._status_message.set(f'{len(net_objects)} net objects selected.')
+
     def _on_group_selection_change(self, group):
         for configure in self._group_dependent_widgets_configures:
             configure(state=tk.NORMAL if group else tk.DISABLED)
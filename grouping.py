@@ -1,23 +1,137 @@
-'''Grouping of structural data for display.'''
+'''Grouping of structural data for display, independent of any GUI toolkit.
+'''
 
+from array import array
 from collections import defaultdict
-from tkinter import StringVar, BooleanVar
+from collections.abc import Sequence
+from itertools import islice, compress
+
+from transformation import (Line, Plane, LineArray, PlaneArray,
+                            OrientationStatistics)
+
+# Groups of these data types also store measurements column by column.
+ARRAY_TYPES = {Line: LineArray, Plane: PlaneArray}
+# Removed net objects leave gaps in a group's storage, which are closed once
+# there are at least this many and they make up half of it.
+MIN_COMPACTION = 64
+# Removal generation of net objects that are still in their group.
+NEVER = 2**63 - 1
+
+
+class Observable:
+    '''A value that tells observers when it is set, like a Tk variable.
+
+    ui.tk_variable keeps a Tk variable in sync with an Observable, e.g. for
+    use with widgets.
+    '''
+
+    def __init__(self, value=None):
+        self._value = value
+        self._observers = []
+
+    def get(self):
+        '''Return the current value.'''
+        return self._value
+
+    def set(self, value):
+        '''Change the value, calling observers with it if it is different.'''
+        if value != self._value:
+            self._value = value
+            for observer in self._observers[:]:
+                observer(value)
+
+    def trace(self, observer):
+        '''Call observer(value) whenever the value changes.'''
+        self._observers.append(observer)
+
+    def untrace(self, observer):
+        '''Stop calling a previously registered observer.'''
+        try:
+            self._observers.remove(observer)
+        except ValueError:
+            # observer was not registered to begin with
+            pass
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self._value)
+
+
+class NetObjectsView(Sequence):
+    '''A read-only snapshot of the net objects held in a DataGroup.
+
+    Views share storage with their group rather than copying it. Groups only
+    append to storage, and mark removed net objects with the generation of
+    views that no longer see them, so views see the first stop slots except
+    those removed before the view was made.
+    '''
+
+    __slots__ = '_netobjs', '_removed_at', '_generation', '_stop', \
+        '_length', '_slots'
+
+    def __init__(self, netobjs, removed_at, generation, stop, length):
+        # removed_at is None if no slot had been removed.
+        self._netobjs, self._removed_at = netobjs, removed_at
+        self._generation, self._stop, self._length = generation, stop, length
+        # Storage slots of the view's net objects, once needed.
+        self._slots = None
+
+    def _seen(self):
+        return (removed_at > self._generation
+                for removed_at in islice(self._removed_at, self._stop))
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if self._slots is None and self._removed_at is not None:
+            self._slots = list(compress(range(self._stop), self._seen()))
+        slots = range(self._stop) if self._slots is None else self._slots
+        if isinstance(index, slice):
+            return [self._netobjs[slot] for slot in slots[index]]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('view index out of range')
+        return self._netobjs[slots[index]]
+
+    def __iter__(self):
+        if self._removed_at is None:
+            return islice(self._netobjs, self._stop)
+        return compress(islice(self._netobjs, self._stop), self._seen())
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, list(self))
 
 
 class DataGroup:
     '''A group of data of the same type.'''
 
     def __init__(self, name, data_type=None, enabled=True, **style):
-        self._data = []
         self._data_type = data_type
+        # Net objects, their IDs and the generation they were removed in (or
+        # NEVER) by storage slot, with measurements in columns if the data
+        # type is in ARRAY_TYPES.
+        self._netobjs, self._ids, self._columns = [], array('q'), None
+        self._removed_at = array('q')
+        # Slots by ID, IDs by id() of net objects (equal net objects hash
+        # alike, which would make lookups slow) and the number of removed
+        # slots.
+        self._slots, self._netobj_ids, self._removed = {}, {}, 0
+        # The generation of the latest NetObjectsView; views see net objects
+        # removed in later generations.
+        self._next_id, self._generation = 0, 0
+        # Statistics of the direction cosines of Lines or poles of Planes,
+        # kept up to date as data are added and removed; None for other
+        # data types.
+        self.statistics = None
         self._callbacks = defaultdict(list)
         self.style = style
-        self.name = StringVar(None, name)
-        self.enabled = BooleanVar(None, enabled)
-        def update_hidden_status(*_):
+        self.name = Observable(name)
+        self.enabled = Observable(bool(enabled))
+        def update_hidden_status(_):
             for callback in self._callbacks['change_group_enabled']:
                 callback(self)
-        self.enabled.trace('w', update_hidden_status)
+        self.enabled.trace(update_hidden_status)
 
     @property
     def data_type(self):
@@ -26,29 +140,187 @@ class DataGroup:
 
     @data_type.setter
     def data_type(self, value):
-        if not self._data:
+        if self._is_empty():
             self._data_type = value
+            self._clear_storage()
             for callback in self._callbacks['change_data_type']:
                 callback(self)
         elif self._data_type != value:
             raise ValueError('cannot change data_type if the group holds data')
 
+    def _is_empty(self):
+        return len(self._netobjs) == self._removed
+
+    def _clear_storage(self):
+        # Views keep the old storage, so there's no need to copy it.
+        self._netobjs, self._ids, self._columns = [], array('q'), None
+        self._removed_at = array('q')
+        self._slots.clear()
+        self._netobj_ids.clear()
+        self._removed = 0
+        self.statistics = None
+
+    def _fire(self, event, netobjs):
+        '''Call callbacks of a batched event and of its per-item event.'''
+        for callback in self._callbacks[event + 's']:
+            callback(self, netobjs)
+        # Only loop over the net objects if anyone wants to know.
+        if self._callbacks[event]:
+            for netobj in netobjs:
+                for callback in self._callbacks[event]:
+                    callback(self, netobj)
+
     def add_net_object(self, netobj):
-        '''Append the specified structural datum to the group.'''
-        if not self._data and not self._data_type:
-            self._data_type = type(netobj)
-        elif self._data and not isinstance(netobj, self._data_type):
-            raise TypeError('expected a {}, but got a {}'.format(
-                self._data_type.__name__, type(netobj).__name__))
-        self._data.append(netobj)
-        for callback in self._callbacks['add_item']:
-            callback(self, netobj)
+        '''Append the specified structural datum to the group.
+
+        Returns the ID of the net object, which stays the same as long as it
+        is in the group.
+        '''
+        return self.add_net_objects((netobj,))[0]
+
+    def add_net_objects(self, netobjs):
+        '''Append many structural data to the group at once.
+
+        Their type is checked before any is added, and only one add_items
+        event is raised. Returns a list of the net objects' IDs.
+        '''
+        netobjs = list(netobjs)
+        data_type = self._check_new(netobjs)
+        return self._add_checked(netobjs, data_type)
+
+    def _check_new(self, netobjs, replacing=False):
+        '''Check that netobjs can be added to the group.
+
+        Returns the group's data type once they are added. If replacing, the
+        group's current net objects are ignored.
+        '''
+        data_type = self._data_type
+        if data_type is None and netobjs:
+            data_type = type(netobjs[0])
+        for netobj in netobjs:
+            if not isinstance(netobj, data_type):
+                raise TypeError('expected a {}, but got a {}'.format(
+                    data_type.__name__, type(netobj).__name__))
+        new_ids = set(map(id, netobjs))
+        # set.isdisjoint would iterate over the whole dict.
+        if len(new_ids) < len(netobjs) or not replacing and \
+           any(new_id in self._netobj_ids for new_id in new_ids):
+            raise ValueError('net objects can only be in a group once')
+        return data_type
+
+    def _add_checked(self, netobjs, data_type):
+        '''Add netobjs, which _check_new returned data_type for.'''
+        if not netobjs:
+            return []
+        self._data_type = data_type
+        if self._columns is None and self._data_type in ARRAY_TYPES:
+            self._columns = ARRAY_TYPES[self._data_type]()
+            self.statistics = OrientationStatistics()
+        if self._columns is not None and len(netobjs) == 1:
+            # Arrays would only slow down adding single net objects.
+            self._columns.append(netobjs[0])
+            self.statistics.add(netobjs[0].direction_cosines())
+        elif self._columns is not None:
+            added = self._columns.from_items(netobjs)
+            for field in added.FIELDS:
+                getattr(self._columns, field).extend(getattr(added, field))
+            self.statistics.add_array(added.direction_cosines())
+        idents = range(self._next_id, self._next_id + len(netobjs))
+        first_slot, self._next_id = len(self._netobjs), idents.stop
+        self._slots.update(zip(idents, range(first_slot,
+                                             first_slot + len(idents))))
+        self._netobj_ids.update(zip(map(id, netobjs), idents))
+        # Views don't see net objects beyond their length, so appending to
+        # shared storage is fine.
+        self._netobjs.extend(netobjs)
+        self._ids.extend(idents)
+        self._removed_at.extend([NEVER] * len(idents))
+        self._fire('add_item', netobjs)
+        return list(idents)
+
+    def replace_all(self, netobjs):
+        '''Replace all structural data in the group with netobjs.
+
+        This raises one remove_items and one add_items event.
+        '''
+        netobjs = list(netobjs)
+        data_type = self._check_new(netobjs, replacing=True)
+        removed = self.net_objects()
+        self._clear_storage()
+        if removed:
+            self._fire('remove_item', removed)
+        return self._add_checked(netobjs, data_type)
+
+    def set_style(self, **style):
+        '''Change options that the group's net objects are plotted with.'''
+        self.style.update(style)
+        for callback in self._callbacks['change_style']:
+            callback(self)
 
     def remove_net_object(self, netobj):
         '''Remove the specified structural datum from the group.'''
-        self._data.remove(netobj)
-        for callback in self._callbacks['remove_item']:
-            callback(self, netobj)
+        self.remove_net_objects((netobj,))
+
+    def remove_net_objects(self, netobjs):
+        '''Remove many structural data from the group at once.
+
+        Nothing is removed unless all of them are in the group, and only one
+        remove_items event is raised.
+        '''
+        try:
+            idents = [self._netobj_ids[id(netobj)] for netobj in netobjs]
+        except KeyError:
+            raise ValueError('net objects must be in the group') from None
+        self.remove_net_objects_by_id(idents)
+
+    def remove_net_object_by_id(self, ident):
+        '''Remove the structural datum with the given ID from the group.'''
+        self.remove_net_objects_by_id((ident,))
+
+    def remove_net_objects_by_id(self, idents):
+        '''Remove the structural data with the given IDs from the group.'''
+        idents = list(idents)
+        try:
+            slots = [self._slots[ident] for ident in idents]
+        except KeyError:
+            raise ValueError('net objects must be in the group') from None
+        if len(set(slots)) < len(slots):
+            raise ValueError('net objects can only be removed once')
+        if not slots:
+            return
+        # Views made so far still see the removed net objects.
+        generation, removed = self._generation + 1, []
+        for ident, slot in zip(idents, slots):
+            netobj = self._netobjs[slot]
+            self._removed_at[slot] = generation
+            del self._slots[ident], self._netobj_ids[id(netobj)]
+            removed.append(netobj)
+        self._removed += len(removed)
+        if self.statistics is not None and len(removed) == 1:
+            self.statistics.subtract(removed[0].direction_cosines())
+        elif self.statistics is not None:
+            self.statistics.subtract_array(
+                self._columns.from_items(removed).direction_cosines())
+        if self._removed >= max(MIN_COMPACTION, len(self._netobjs) // 2):
+            self._compact()
+        self._fire('remove_item', removed)
+
+    def _compact(self):
+        '''Close the gaps that removed net objects left in storage.'''
+        # Views keep the old storage, so build new storage.
+        kept = [slot for slot, removed_at in enumerate(self._removed_at)
+                if removed_at == NEVER]
+        self._netobjs = [self._netobjs[slot] for slot in kept]
+        self._ids = array('q', [self._ids[slot] for slot in kept])
+        self._removed_at = array('q', [NEVER]) * len(kept)
+        self._slots = {ident: slot for slot, ident in enumerate(self._ids)}
+        if self._columns is not None:
+            # pylint: disable=protected-access
+            self._columns = self._columns._from_columns(*(
+                array('d', [getattr(self._columns, field)[slot]
+                            for slot in kept])
+                for field in self._columns.FIELDS))
+        self._removed = 0
 
     def delete(self):
         '''Delete the entire group.'''
@@ -57,14 +329,52 @@ class DataGroup:
             callback(self)
 
     def net_objects(self):
-        '''Return structural data held in the group.'''
-        return self._data.copy()
+        '''Return structural data held in the group, as a NetObjectsView.
+
+        The view does not change with the group, like a copy, but only takes
+        O(1) time to make.
+        '''
+        self._generation += 1
+        return NetObjectsView(
+            self._netobjs, self._removed_at if self._removed else None,
+            self._generation, len(self._netobjs),
+            len(self._netobjs) - self._removed)
+
+    def net_object_ids(self):
+        '''Return the IDs of the group's net objects, in the same order.'''
+        if self._removed:
+            self._compact()
+        return self._ids[:]
+
+    def net_object(self, ident):
+        '''Return the net object with the given ID.'''
+        return self._netobjs[self._slots[ident]]
+
+    def net_object_array(self):
+        '''Return a copy of the group's measurements, column by column.
+
+        This is a LineArray or PlaneArray, depending on the data type.
+        '''
+        try:
+            array_type = ARRAY_TYPES[self._data_type]
+        except KeyError:
+            raise TypeError('{} groups have no array type'.format(
+                getattr(self._data_type, '__name__', None))) from None
+        if self._columns is None:
+            return array_type()
+        if self._removed:
+            self._compact()
+        # pylint: disable=protected-access
+        return array_type._from_columns(*(
+            getattr(self._columns, field)[:] for field in array_type.FIELDS))
 
     def bind(self, **callbacks):
         '''Register a function to be called when an event is raised.
 
-        Available events are change_group_enabled, add_item, remove_item,
-        remove_group.
+        Available events are change_group_enabled, change_style, add_item,
+        add_items, remove_item, remove_items, remove_group. Callbacks of
+        add_items and remove_items get a sequence of all net objects added or
+        removed at once, rather than one call per net object.
         '''
         for key, callback in callbacks.items():
             self._callbacks[key].append(callback)
@@ -0,0 +1,279 @@
+'''Stereonet projections of net objects, independent of any GUI toolkit.'''
+
+import abc
+import json
+import os.path
+from array import array
+from operator import mul
+from math import sqrt, pi, sin, cos, tan, radians, degrees
+
+from transformation import Plane, Line, Rotation, LineArray
+
+# Adaptive curve sampling starts with this many segments per curve...
+MIN_CURVE_SEGMENTS = 8
+# ...and halves segments at most this many times.
+MAX_CURVE_REFINEMENTS = 10
+# Guides are sampled to within this distance in mathematical space by default,
+# which is half a pixel on a 2000 px stereonet, so one table suits most nets.
+GUIDE_TOLERANCE = .0005
+# Increment this when the format of guide table files changes.
+GUIDE_TABLE_VERSION = 1
+
+
+def latitude_guide(latitude):
+    '''Create a small circle at the specified -pi/2 <= latitude <= pi/2.'''
+    assert -pi/2 <= latitude <= pi/2, latitude
+    return Rotation(Line(0, 0), Line(0, pi/2 - latitude))
+
+
+def dip_guide(dip, left_hemisphere=False):
+    '''Create a great circle at the specified 0 <= dip <= pi/2.
+
+    Pass left_hemisphere=True to create the guide with strike pi so that it
+    appears to dip left, else it'll dip to the right.
+    '''
+    assert 0 <= dip <= pi/2, dip
+    strike = pi if left_hemisphere else 0
+    return Rotation(Plane(strike, dip).pole(), Line(0, strike))
+
+
+def guide_rotations(spacing=radians(10)):
+    '''Create all guides of a grid with the given angular spacing.'''
+    # Allow for rounding errors, e.g. if spacing is radians(10).
+    steps = int(pi / 2 / spacing + 1e-9)
+    guides = [latitude_guide(i * spacing) for i in range(-steps, steps + 1)]
+    # Steep dip guides up to, but excluding, the vertical one.
+    dip_steps = steps + 1 if steps * spacing < pi/2 - 1e-9 else steps
+    for i in range(dip_steps):
+        for left_hemisphere in True, False:
+            guides.append(dip_guide(i * spacing, left_hemisphere))
+    guides.append(dip_guide(pi / 2))
+    return guides
+
+
+def flat_coordinates(math_xs, math_ys):
+    '''Interleave x and y coordinates into one flat array.'''
+    coords = array('d', bytes(16 * len(math_xs)))
+    coords[0::2], coords[1::2] = array('d', math_xs), array('d', math_ys)
+    return coords
+
+
+class Projection(metaclass=abc.ABCMeta):
+    '''Places net objects in mathematical space.
+
+    x increases right, y increases up; the centre of the net is (0, 0) and its
+    rim is the unit circle. Coordinate transformations must be implemented in
+    subclasses.
+    '''
+
+    # Names the projection in guide table files.
+    projection_name = None
+
+    @classmethod
+    @abc.abstractmethod
+    def line_coordinates(cls, line):
+        '''Calculate where a point representing a line should be placed.'''
+        raise NotImplementedError
+
+    @classmethod
+    @abc.abstractmethod
+    def direction_cosines_coordinates(cls, cosines):
+        '''Calculate where points for many lines should be placed.
+
+        This takes a DirectionCosinesArray (of lower-hemisphere vectors) and
+        returns two arrays, of x and y coordinates in mathematical space, like
+        those line_coordinates returns.
+        '''
+        raise NotImplementedError
+
+    @classmethod
+    def lines_coordinates(cls, lines):
+        '''Calculate where points for many lines should be placed.
+
+        This takes a LineArray (or an iterable of Lines) and returns two
+        arrays, of x and y coordinates in mathematical space, like those
+        line_coordinates returns.
+        '''
+        if not isinstance(lines, LineArray):
+            lines = LineArray.from_items(lines)
+        # pi/4 - plunge/2 is common to both projections; compute it once.
+        radii = cls.projected_radii([pi/4 - plunge/2
+                                     for plunge in lines.plunge])
+        return (array('d', map(mul, radii, map(sin, lines.trend))),
+                array('d', map(mul, radii, map(cos, lines.trend))))
+
+    @classmethod
+    @abc.abstractmethod
+    def projected_radii(cls, half_colatitudes):
+        '''Calculate distances of many points from the centre of the net.
+
+        Each point is given as pi/4 - plunge/2 of the line it represents.
+        '''
+        raise NotImplementedError
+
+    @classmethod
+    def adaptive_rotation_coordinates(cls, rotation, tolerance):
+        '''Sample a rotation more densely where it curves more on the net.
+
+        Segments are split in half while their midpoint is more than
+        tolerance off the straight line between their ends. Both tolerance
+        and the returned arrays of x and y coordinates are in mathematical
+        space.
+        '''
+        def sample(angles):
+            math_xs, math_ys = cls.direction_cosines_coordinates(
+                rotation.direction_cosines_at(angles))
+            return list(zip(angles, math_xs, math_ys))
+
+        points = sample([i * pi / MIN_CURVE_SEGMENTS
+                         for i in range(MIN_CURVE_SEGMENTS + 1)])
+        # Whether the segment starting at the corresponding point may need
+        # splitting. The last point doesn't start a segment.
+        rough = [True] * (len(points) - 1)
+        for _ in range(MAX_CURVE_REFINEMENTS):
+            if not any(rough):
+                break
+            midpoints = iter(sample([(points[i][0] + points[i + 1][0]) / 2
+                                     for i, is_rough in enumerate(rough)
+                                     if is_rough]))
+            new_points, new_rough = [], []
+            for i, is_rough in enumerate(rough):
+                (_, x_0, y_0), (_, x_1, y_1) = points[i], points[i + 1]
+                new_points.append(points[i])
+                if not is_rough:
+                    new_rough.append(False)
+                    continue
+                midpoint = next(midpoints)
+                _, mid_x, mid_y = midpoint
+                if abs(complex(mid_x - (x_0 + x_1) / 2,
+                               mid_y - (y_0 + y_1) / 2)) > tolerance:
+                    new_points.append(midpoint)
+                    new_rough.extend((True, True))
+                else:
+                    new_rough.append(False)
+            new_points.append(points[-1])
+            points, rough = new_points, new_rough
+        _, math_xs, math_ys = zip(*points)
+        return math_xs, math_ys
+
+    # Guide tables already computed by this process, by projection, spacing
+    # and tolerance.
+    _guide_tables = {}
+
+    @classmethod
+    def guide_table(cls, spacing=radians(10), cache_dir=None,
+                    tolerance=GUIDE_TOLERANCE):
+        '''Get the coordinates of guide curves with the given spacing.
+
+        This returns one flat array of alternating x and y coordinates in
+        mathematical space for each guide, sampled to within tolerance. Tables
+        are only computed once per projection, spacing and tolerance. If
+        cache_dir is given, tables are also saved there as JSON and loaded
+        from there by later processes.
+        '''
+        key = cls.projection_name, spacing, tolerance
+        try:
+            return cls._guide_tables[key]
+        except KeyError:
+            pass
+        file_name = None
+        if cache_dir:
+            file_name = os.path.join(
+                cache_dir, '{}-guides-{:g}-{:g}.json'.format(
+                    cls.projection_name, degrees(spacing), tolerance))
+        table = cls._load_guide_table(file_name, spacing, tolerance)
+        if table is None:
+            table = [
+                flat_coordinates(*cls.adaptive_rotation_coordinates(
+                    rotation, tolerance))
+                for rotation in guide_rotations(spacing)]
+            cls._save_guide_table(file_name, spacing, tolerance, table)
+        cls._guide_tables[key] = table
+        return table
+
+    @classmethod
+    def _guide_table_header(cls, spacing, tolerance):
+        return {'version': GUIDE_TABLE_VERSION,
+                'projection': cls.projection_name, 'spacing': spacing,
+                'tolerance': tolerance}
+
+    @classmethod
+    def _load_guide_table(cls, file_name, spacing, tolerance):
+        '''Load a guide table saved earlier, or return None if impossible.'''
+        if not file_name:
+            return None
+        try:
+            with open(file_name) as table_file:
+                saved = json.load(table_file)
+        except (OSError, ValueError):
+            return None
+        if saved.get('header') != cls._guide_table_header(spacing,
+                                                          tolerance):
+            return None
+        return [array('d', math_coords) for math_coords in saved['guides']]
+
+    @classmethod
+    def _save_guide_table(cls, file_name, spacing, tolerance, table):
+        '''Save a guide table if possible; failing is not an error.'''
+        if not file_name:
+            return
+        try:
+            os.makedirs(os.path.dirname(file_name), exist_ok=True)
+            with open(file_name, 'w') as table_file:
+                json.dump({'header': cls._guide_table_header(spacing,
+                                                             tolerance),
+                           'guides': [c.tolist() for c in table]}, table_file)
+        except OSError:
+            pass
+
+
+class EqualAngleProjection(Projection):
+    '''Equal angle projection -- preserves angles, but not areas.'''
+
+    projection_name = 'EqualAngle'
+
+    @classmethod
+    def line_coordinates(cls, line):
+        # tan(pi/4 - plunge/2) * sin(trend), etc., but using the line's cached
+        # direction cosines instead of more trigonometry.
+        north, east, down = line.direction_cosines()
+        return east / (1 + down), north / (1 + down)
+
+    @classmethod
+    def direction_cosines_coordinates(cls, cosines):
+        scales = [1 / (1 + down) for down in cosines.down]
+        return (array('d', map(mul, cosines.east, scales)),
+                array('d', map(mul, cosines.north, scales)))
+
+    @classmethod
+    def projected_radii(cls, half_colatitudes):
+        return array('d', map(tan, half_colatitudes))
+
+
+class EqualAreaProjection(Projection):
+    '''Equal area projection -- preserves areas, but not angles.'''
+
+    projection_name = 'EqualArea'
+
+    @classmethod
+    def line_coordinates(cls, line):
+        # sqrt(2) * sin(pi/4 - plunge/2) * sin(trend), etc., but using the
+        # line's cached direction cosines instead of more trigonometry.
+        north, east, down = line.direction_cosines()
+        scale = sqrt(1 + down)
+        return east / scale, north / scale
+
+    @classmethod
+    def direction_cosines_coordinates(cls, cosines):
+        scales = [1 / sqrt(1 + down) for down in cosines.down]
+        return (array('d', map(mul, cosines.east, scales)),
+                array('d', map(mul, cosines.north, scales)))
+
+    @classmethod
+    def projected_radii(cls, half_colatitudes):
+        return array('d', [sqrt(2) * sin(angle) for angle in half_colatitudes])
+
+
+# Projections by name, e.g. for passing them to other processes.
+PROJECTIONS = {projection.projection_name: projection
+               for projection in (EqualAngleProjection, EqualAreaProjection)}
@@ -0,0 +1,102 @@
+'''Rasterising of many points into images, independent of any GUI toolkit.'''
+
+import struct
+import zlib
+from array import array
+from math import floor
+from itertools import accumulate, repeat
+from operator import add, sub
+
+
+class PointRaster:
+    '''Counts how many points fall onto each pixel of an image.'''
+
+    def __init__(self, width, height):
+        self.width, self.height = width, height
+        self.counts = array('I', bytes(4 * width * height))
+
+    def add_points(self, screen_coords, x_offset=0, y_offset=0):
+        '''Count points given as flat alternating x and y coordinates.
+
+        The image's top left corner is at (x_offset, y_offset). Returns a list
+        with the pixel index of each point, or None for points outside the
+        image.
+        '''
+        width, height, counts = self.width, self.height, self.counts
+        pixels = []
+        for x, y in zip(screen_coords[0::2], screen_coords[1::2]):
+            # Round towards minus infinity; int() would round towards zero.
+            col, row = floor(x - x_offset), floor(y - y_offset)
+            if 0 <= col < width and 0 <= row < height:
+                pixel = row * width + col
+                counts[pixel] += 1
+                pixels.append(pixel)
+            else:
+                pixels.append(None)
+        return pixels
+
+    def spread_counts(self, radius):
+        '''Add each pixel's count to its neighbours up to radius away.
+
+        Returns a list of the resulting counts of all pixels, row by row.
+        '''
+        width, height, counts = self.width, self.height, self.counts
+        padding, side = [0] * radius, 2 * radius + 1
+        # Sum along rows using running totals, then along columns by sliding
+        # a window of rows; a square is separable, so this is the same.
+        along_rows = []
+        for row in range(height):
+            cur = counts[row * width:(row + 1) * width]
+            if any(cur):
+                totals = [0]
+                totals.extend(accumulate(padding + cur.tolist() + padding))
+                along_rows.append(list(map(sub, totals[side:],
+                                           totals[:width])))
+            else:
+                along_rows.append([0] * width)
+        spread, window = [], [0] * width
+        for row in range(-radius, height):
+            if row + radius < height:
+                window = list(map(add, window, along_rows[row + radius]))
+            if row - radius - 1 >= 0:
+                window = list(map(sub, window, along_rows[row - radius - 1]))
+            if row >= 0:
+                spread.extend(window)
+        return spread
+
+    def to_rgba(self, rgb, alpha=.35, radius=1):
+        '''Draw counted points in colour rgb onto a transparent background.
+
+        Every point drawn onto a pixel makes it more opaque, as if points of
+        the given alpha were blended on top of each other. Points are drawn as
+        squares of side 2 * radius + 1. Returns a bytearray of RGBA pixels.
+        '''
+        # Opacity of a pixel only depends on how many points it holds, and
+        # hardly changes any more after 255 points.
+        opacities = bytes(int(round(255 * (1 - (1 - alpha)**count)))
+                          for count in range(256))
+        counts = bytes(map(min, self.spread_counts(radius), repeat(255)))
+        rgba = bytearray(bytes(rgb) + b'\0') * (self.width * self.height)
+        rgba[3::4] = counts.translate(opacities)
+        return rgba
+
+
+def png_bytes(width, height, rgba, level=1):
+    '''Encode RGBA pixel data (e.g. from PointRaster.to_rgba) as a PNG.
+
+    level is the zlib compression level; the default favours speed over size.
+    '''
+    def chunk(kind, data):
+        checksum = zlib.crc32(kind + data) & 0xffffffff
+        return struct.pack('>I', len(data)) + kind + data + \
+            struct.pack('>I', checksum)
+
+    stride = 4 * width
+    # Every row starts with a filter type byte; 0 means no filter.
+    raw = b''.join(b'\0' + bytes(rgba[row * stride:(row + 1) * stride])
+                   for row in range(height))
+    # 8 bits per channel, colour type 6 (RGBA), default compression etc.
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    return b''.join((b'\x89PNG\r\n\x1a\n', chunk(b'IHDR', header),
+                     chunk(b'IDAT', zlib.compress(raw, level)),
+                     chunk(b'IEND', b'')))
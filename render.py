@@ -0,0 +1,283 @@
+'''Drawing of stereonets into image files, independent of any GUI toolkit.
+
+Nets are drawn from plain data -- net objects and their styles -- so this
+works without a display, e.g. in worker processes.
+'''
+
+import abc
+import os.path
+from array import array
+from math import radians, ceil, hypot
+from xml.sax.saxutils import quoteattr
+
+from transformation import Line, Circle
+from raster import png_bytes
+
+# Options that lines and planes are drawn with by default, in Tk's terms.
+LINE_OPTIONS = {
+    'width': 1,  # outline thickness
+    'fill': 'green',
+    'outline': 'darkgreen',
+    'activefill': 'red',
+    'activeoutline': 'darkred',
+}
+PLANE_OPTIONS = {
+    'width': 2,
+    'fill': 'blue',
+    'activefill': 'red',
+    'activewidth': 3,
+    'disabledwidth': 1,
+    'disabledfill': 'gray',
+}
+# Colours by name, as Tk 8.6 and SVG define them, for drawing without Tk.
+COLOURS = {
+    'black': (0, 0, 0), 'white': (255, 255, 255),
+    'gray': (128, 128, 128), 'grey': (128, 128, 128),
+    'darkgray': (169, 169, 169), 'darkgrey': (169, 169, 169),
+    'lightgray': (211, 211, 211), 'lightgrey': (211, 211, 211),
+    'red': (255, 0, 0), 'darkred': (139, 0, 0),
+    'green': (0, 128, 0), 'darkgreen': (0, 100, 0),
+    'lime': (0, 255, 0), 'blue': (0, 0, 255), 'darkblue': (0, 0, 139),
+    'navy': (0, 0, 128), 'cyan': (0, 255, 255), 'magenta': (255, 0, 255),
+    'yellow': (255, 255, 0), 'orange': (255, 165, 0),
+    'purple': (128, 0, 128), 'brown': (165, 42, 42), 'pink': (255, 192, 203),
+}
+
+
+def parse_colour(colour):
+    '''Convert a colour name or #rgb or #rrggbb to a tuple (r, g, b).'''
+    if colour.startswith('#') and len(colour) in (4, 7):
+        digits = len(colour) // 3
+        try:
+            return tuple(int(colour[i:i + digits], 16) * (17 if digits == 1
+                                                          else 1)
+                         for i in range(1, len(colour), digits))
+        except ValueError:
+            pass
+    try:
+        return COLOURS[colour.lower().replace(' ', '')]
+    except KeyError:
+        raise ValueError('unknown colour {!r}; only some names are known '
+                         'without Tk, so pass #rrggbb instead'.format(
+                             colour)) from None
+
+
+def drawn_options(options):
+    '''Get the fill, outline and width that items are drawn with in Tk.
+
+    Returns None for hidden items, and an empty string for missing colours.
+    '''
+    state = options.get('state')
+    if state == 'hidden':
+        return None
+    def option(name):
+        if state == 'disabled' and options.get('disabled' + name):
+            return options['disabled' + name]
+        return options.get(name, '')
+    return option('fill'), option('outline'), option('width') or 1
+
+
+class Renderer(metaclass=abc.ABCMeta):
+    '''Draws primitives onto a square image, in screen coordinates.
+
+    Screen coordinates are in pixels from the top left of the image, like
+    those of a Stereonet at its default view.
+    '''
+
+    def __init__(self, size, background='white'):
+        self.size = size
+        self.background = background
+
+    @property
+    def point_radius(self):
+        '''Radius of "points" (that represent Lines) on the stereonet.'''
+        return self.size // 200
+
+    def to_screen_coords(self, math_xs, math_ys):
+        '''Convert coordinates from mathematical to screen space.
+
+        Returns one flat array of alternating x and y coordinates.
+        '''
+        half_size = self.size / 2
+        coords = array('d', bytes(16 * len(math_xs)))
+        coords[0::2] = array('d', [(x + 1) * half_size for x in math_xs])
+        coords[1::2] = array('d', [(1 - y) * half_size for y in math_ys])
+        return coords
+
+    @abc.abstractmethod
+    def points(self, coords, fill, outline, width):
+        '''Draw a point of radius point_radius at each pair of coords.
+
+        The points look like the ovals that Stereonet.plot_lines creates.
+        '''
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def polyline(self, coords, fill, width):
+        '''Draw a line through flat alternating x and y coordinates.'''
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def data(self):
+        '''Get the finished image, encoded as bytes.'''
+        raise NotImplementedError
+
+
+class SVGRenderer(Renderer):
+    '''Draws into an SVG image.'''
+
+    def __init__(self, size, background='white'):
+        super().__init__(size, background)
+        self._elements = [
+            '<svg xmlns="http://www.w3.org/2000/svg" width="{0}" height="{0}"'
+            ' viewBox="0 0 {0} {0}">'.format(size),
+            '<rect width="100%" height="100%" fill={}/>'.format(
+                quoteattr(background))]
+
+    @staticmethod
+    def _paint(fill, outline, width):
+        return 'fill={} stroke={} stroke-width="{}"'.format(
+            quoteattr(fill or 'none'), quoteattr(outline or 'none'), width)
+
+    def points(self, coords, fill, outline, width):
+        # Tk draws ovals inside their bounding box, which is one pixel wider
+        # than the point's diameter, so outlines can't be wider than the
+        # point's radius; SVG strokes straddle the circle.
+        outer_r = self.point_radius + .5
+        width = min(width, outer_r)
+        point_r = outer_r - width / 2
+        paint = self._paint(fill, outline, width)
+        self._elements.append('<g {}>'.format(paint))
+        self._elements.extend(
+            '<circle cx="{:.2f}" cy="{:.2f}" r="{:g}"/>'.format(
+                x + .5, y + .5, point_r)
+            for x, y in zip(coords[0::2], coords[1::2]))
+        self._elements.append('</g>')
+
+    def polyline(self, coords, fill, width):
+        self._elements.append('<polyline points="{}" {}/>'.format(
+            ' '.join(map('{:.2f},{:.2f}'.format, coords[0::2], coords[1::2])),
+            self._paint(None, fill, width)))
+
+    def data(self):
+        return '\n'.join(self._elements + ['</svg>', '']).encode()
+
+
+class PNGRenderer(Renderer):
+    '''Draws into an opaque PNG image, without anti-aliasing.'''
+
+    def __init__(self, size, background='white'):
+        super().__init__(size, background)
+        self._rgba = bytearray(bytes(parse_colour(background)) + b'\xff') * \
+            (size * size)
+        # Offsets of the pixels covered by a disc, by radius.
+        self._discs = {}
+
+    def _disc(self, radius):
+        try:
+            return self._discs[radius]
+        except KeyError:
+            pass
+        reach = ceil(radius)
+        disc = self._discs[radius] = [
+            (d_x, d_y) for d_x in range(-reach, reach + 1)
+            for d_y in range(-reach, reach + 1)
+            if d_x * d_x + d_y * d_y <= radius * radius]
+        return disc
+
+    def _pixels(self, col, row, disc):
+        size = self.size
+        return [(row + d_y) * size + col + d_x for d_x, d_y in disc
+                if 0 <= col + d_x < size and 0 <= row + d_y < size]
+
+    def _paint(self, pixels, colour):
+        rgba, colour = self._rgba, bytes(parse_colour(colour)) + b'\xff'
+        for pixel in pixels:
+            rgba[4 * pixel:4 * pixel + 4] = colour
+
+    def points(self, coords, fill, outline, width):
+        # Like Tk, draw the outline inside the point's bounding box.
+        outer_r = self.point_radius + .5
+        outer, inner = self._disc(outer_r), self._disc(outer_r - width)
+        for x, y in zip(coords[0::2], coords[1::2]):
+            col, row = int(x), int(y)
+            if outline:
+                self._paint(self._pixels(col, row, outer), outline)
+            if fill:
+                self._paint(self._pixels(col, row, inner), fill)
+
+    def polyline(self, coords, fill, width):
+        if not fill:
+            return
+        disc, pixels = self._disc(width / 2), set()
+        xs, ys = coords[0::2], coords[1::2]
+        for x_0, y_0, x_1, y_1 in zip(xs, ys, xs[1:], ys[1:]):
+            # Step at most half a pixel at a time, so the line has no gaps.
+            steps = max(1, ceil(2 * hypot(x_1 - x_0, y_1 - y_0)))
+            for step in range(steps + 1):
+                pixels.update(self._pixels(
+                    int(x_0 + (x_1 - x_0) * step / steps),
+                    int(y_0 + (y_1 - y_0) * step / steps), disc))
+        self._paint(pixels, fill)
+
+    def data(self):
+        return png_bytes(self.size, self.size, self._rgba)
+
+
+def draw_net(renderer, projection, groups, guide_spacing=radians(10),
+             line_options=None, plane_options=None):
+    '''Draw guides, then groups of net objects, using a Projection.
+
+    groups is an iterable of pairs of net objects and options, which override
+    line_options or plane_options like DataGroup.style does on Stereonets.
+    '''
+    line_options = dict(LINE_OPTIONS, **(line_options or {}))
+    plane_options = dict(PLANE_OPTIONS, **(plane_options or {}))
+    if guide_spacing:
+        fill, _, width = drawn_options(dict(plane_options, state='disabled'))
+        for math_coords in projection.guide_table(guide_spacing):
+            renderer.polyline(renderer.to_screen_coords(
+                math_coords[0::2], math_coords[1::2]), fill, width)
+    for netobjs, options in groups:
+        lines, rotations = [], []
+        for netobj in netobjs:
+            if isinstance(netobj, Line):
+                lines.append(netobj)
+            elif isinstance(netobj, Circle):
+                rotations.append(netobj)
+            else:
+                raise TypeError(type(netobj))
+        drawn = drawn_options(dict(plane_options, **options))
+        if rotations and drawn:
+            fill, _, width = drawn
+            # Sample curves to within half a pixel, like Stereonets do.
+            tolerance = 1 / renderer.size
+            for rotation in rotations:
+                renderer.polyline(renderer.to_screen_coords(
+                    *projection.adaptive_rotation_coordinates(
+                        rotation, tolerance)), fill, width)
+        drawn = drawn_options(dict(line_options, **options))
+        if lines and drawn:
+            renderer.points(renderer.to_screen_coords(
+                *projection.lines_coordinates(lines)), *drawn)
+
+
+# Renderers by the extension of the files they write.
+RENDERERS = {'.svg': SVGRenderer, '.png': PNGRenderer}
+
+
+def export_net(file_name, projection, groups, size=750, **draw_options):
+    '''Draw a net into an SVG or PNG file, depending on its extension.
+
+    See draw_net for the other arguments. Returns file_name.
+    '''
+    extension = os.path.splitext(file_name)[1].lower()
+    try:
+        renderer = RENDERERS[extension](size)
+    except KeyError:
+        raise ValueError('cannot export to {} files'.format(
+            extension or 'extensionless')) from None
+    draw_net(renderer, projection, groups, **draw_options)
+    with open(file_name, 'wb') as image_file:
+        image_file.write(renderer.data())
+    return file_name
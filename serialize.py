@@ -15,14 +15,14 @@ def stereonet_object_encoder(obj):
     tries = [
         # DataGroup
         lambda o: {'name': o.name, 'enabled': o.enabled, 'style': o.style,
-                   'data': o.net_objects()},
+                   'data': list(o.net_objects())},
         # Line
         lambda o: {'plunge': degrees(o.plunge), 'trend': degrees(o.trend)},
         # Plane
         lambda o: {'strike': degrees(o.strike), 'dip': degrees(o.dip)},
         # Rotation
         lambda o: {'rotation_axis': o.rot_axis, 'base_line': o.base_line},
-        # tk.*Var
+        # grouping.Observable
         lambda o: o.get(),
     ]
 
@@ -41,8 +41,7 @@ def stereonet_object_decoder(obj):
     '''
     if 'name' in obj and 'enabled' in obj and 'style' in obj and 'data' in obj:
         group = DataGroup(obj['name'], enabled=obj['enabled'], **obj['style'])
-        for data in obj['data']:
-            group.add_net_object(data)
+        group.add_net_objects(obj['data'])
         return group
     if 'plunge' in obj and 'trend' in obj:
         return Line(**{k: radians(v) for k, v in obj.items()})
@@ -0,0 +1,356 @@
+'''Spatial indexes of projected net objects, independent of any GUI toolkit.'''
+
+from collections import defaultdict
+from heapq import nsmallest
+from math import floor, hypot, sqrt, cos, acos, pi
+
+from transformation import DirectionCosinesArray
+from projections import EqualAreaProjection
+
+# Number of grid cells along each side of a GridIndex by default.
+GRID_CELLS = 64
+# Number of bins along each side of a SphericalBinIndex by default.
+SPHERICAL_BINS = 32
+
+
+def distance_to_segment(x, y, x_0, y_0, x_1, y_1):
+    '''Calculate the distance of (x, y) from the segment (x_0, y_0)-(x_1, y_1).
+    '''
+    d_x, d_y = x_1 - x_0, y_1 - y_0
+    length_squared = d_x * d_x + d_y * d_y
+    if length_squared:
+        # Parameter of the closest point on the segment, 0 at its start.
+        param = max(0, min(1, ((x - x_0) * d_x + (y - y_0) * d_y) /
+                           length_squared))
+        x_0, y_0 = x_0 + param * d_x, y_0 + param * d_y
+    return hypot(x - x_0, y - y_0)
+
+
+def point_in_polygon(x, y, vertices):
+    '''Test whether (x, y) lies in the polygon given as a list of (x, y).'''
+    inside = False
+    x_0, y_0 = vertices[-1]
+    for x_1, y_1 in vertices:
+        # Count crossings of a ray from (x, y) to the right.
+        if (y_1 > y) != (y_0 > y) and \
+           x < x_0 + (y - y_0) * (x_1 - x_0) / (y_1 - y_0):
+            inside = not inside
+        x_0, y_0 = x_1, y_1
+    return inside
+
+
+class GridIndex:
+    '''Finds net objects near points in mathematical space.
+
+    Projected Lines are stored as points and projected Rotations as curves,
+    i.e. flat sequences of alternating x and y coordinates. Both are filed
+    under the square grid cells they touch, covering -1 <= x, y <= 1.
+    '''
+
+    def __init__(self, cells=GRID_CELLS):
+        self.cells = cells
+        self._cell_size = 2 / cells
+        # Net objects by cell, each keyed by id() like the cells and shapes
+        # below, as equal net objects hash alike. A shape is a tuple (x, y)
+        # for points and an array or list for curves.
+        self._netobjs = defaultdict(dict)
+        self._cells, self._shapes = {}, {}
+
+    def __len__(self):
+        return len(self._shapes)
+
+    def __contains__(self, netobj):
+        return id(netobj) in self._shapes
+
+    def _cell(self, x, y):
+        # Clamp coordinates so that points on the rim fit into the grid.
+        last = self.cells - 1
+        return (max(0, min(last, floor((x + 1) / self._cell_size))),
+                max(0, min(last, floor((y + 1) / self._cell_size))))
+
+    def _cells_in_box(self, x_0, y_0, x_1, y_1):
+        (col_0, row_0), (col_1, row_1) = self._cell(x_0, y_0), \
+            self._cell(x_1, y_1)
+        return [(col, row) for col in range(col_0, col_1 + 1)
+                for row in range(row_0, row_1 + 1)]
+
+    def _file(self, netobj, shape, cells):
+        key = id(netobj)
+        if key in self._shapes:
+            self.remove(netobj)
+        self._shapes[key], self._cells[key] = shape, cells
+        for cell in cells:
+            self._netobjs[cell][key] = netobj
+
+    def add_point(self, netobj, x, y):
+        '''Index netobj as a point at (x, y).'''
+        self._file(netobj, (x, y), (self._cell(x, y),))
+
+    def add_points(self, netobjs, math_xs, math_ys):
+        '''Index many net objects as points at once.'''
+        for netobj, x, y in zip(netobjs, math_xs, math_ys):
+            self._file(netobj, (x, y), (self._cell(x, y),))
+
+    def add_curve(self, netobj, math_coords):
+        '''Index netobj as a curve through the given flat coordinates.'''
+        cells = set()
+        xs, ys = math_coords[0::2], math_coords[1::2]
+        for x_0, y_0, x_1, y_1 in zip(xs, ys, xs[1:], ys[1:]):
+            cells.update(self._cells_in_box(min(x_0, x_1), min(y_0, y_1),
+                                            max(x_0, x_1), max(y_0, y_1)))
+        if len(xs) == 1:
+            cells.add(self._cell(xs[0], ys[0]))
+        self._file(netobj, math_coords, tuple(cells))
+
+    def remove(self, netobj):
+        '''Stop indexing netobj. If it isn't indexed, do nothing.'''
+        key = id(netobj)
+        for cell in self._cells.pop(key, ()):
+            cell_netobjs = self._netobjs[cell]
+            del cell_netobjs[key]
+            if not cell_netobjs:
+                del self._netobjs[cell]
+        self._shapes.pop(key, None)
+
+    def clear(self):
+        '''Stop indexing all net objects.'''
+        self._netobjs.clear()
+        self._cells.clear()
+        self._shapes.clear()
+
+    def overlapping(self, x_0, y_0, x_1, y_1):
+        '''Find net objects that may overlap the given box.
+
+        This finds all net objects in the box, and some near it, quickly.
+        '''
+        found = {}
+        for cell in self._cells_in_box(x_0, y_0, x_1, y_1):
+            found.update(self._netobjs.get(cell, {}))
+        return list(found.values())
+
+    def distance(self, netobj, x, y):
+        '''Calculate the distance of (x, y) from an indexed net object.'''
+        shape = self._shapes[id(netobj)]
+        if isinstance(shape, tuple):
+            return hypot(x - shape[0], y - shape[1])
+        xs, ys = shape[0::2], shape[1::2]
+        if len(xs) == 1:
+            return hypot(x - xs[0], y - ys[0])
+        return min(distance_to_segment(x, y, x_0, y_0, x_1, y_1)
+                   for x_0, y_0, x_1, y_1 in zip(xs, ys, xs[1:], ys[1:]))
+
+    def nearest(self, x, y, max_distance, accept=None):
+        '''Find the net object closest to (x, y), if any is in max_distance.
+
+        If accept is given, only net objects for which accept(netobj) is true
+        are considered.
+        '''
+        best, best_distance = None, max_distance
+        for netobj in self.overlapping(x - max_distance, y - max_distance,
+                                       x + max_distance, y + max_distance):
+            distance = self.distance(netobj, x, y)
+            if distance <= best_distance and (accept is None or
+                                              accept(netobj)):
+                best, best_distance = netobj, distance
+        return best
+
+    def _vertices(self, netobj):
+        shape = self._shapes[id(netobj)]
+        if isinstance(shape, tuple):
+            return [shape]
+        return zip(shape[0::2], shape[1::2])
+
+    def in_rectangle(self, x_0, y_0, x_1, y_1):
+        '''Find net objects with a point or curve vertex in the rectangle.'''
+        x_0, x_1 = sorted((x_0, x_1))
+        y_0, y_1 = sorted((y_0, y_1))
+        return [netobj for netobj in self.overlapping(x_0, y_0, x_1, y_1)
+                if any(x_0 <= x <= x_1 and y_0 <= y <= y_1
+                       for x, y in self._vertices(netobj))]
+
+    def in_polygon(self, vertices):
+        '''Find net objects with a point or curve vertex in the polygon.
+
+        The polygon is given as a list of (x, y) vertices, e.g. of a lasso.
+        '''
+        if len(vertices) < 3:
+            return []
+        xs, ys = zip(*vertices)
+        return [netobj for netobj in self.overlapping(min(xs), min(ys),
+                                                      max(xs), max(ys))
+                if any(point_in_polygon(x, y, vertices)
+                       for x, y in self._vertices(netobj))]
+
+
+def axial_angle(cosines, other):
+    '''Calculate the angle between two axes, given as unit vectors.
+
+    Axes have no sense of direction, so this is at most pi/2.
+    '''
+    dot = abs(sum(a * b for a, b in zip(cosines, other)))
+    return acos(min(1, dot))
+
+
+class SphericalBinIndex:
+    '''Finds net objects by their direction, e.g. all within a cone.
+
+    Lines, and Planes by their poles, are filed into bins of equal area on
+    the lower hemisphere: square cells of an equal area projection. Use
+    attach to keep the index up to date with a DataGroup.
+    '''
+
+    def __init__(self, bins=SPHERICAL_BINS):
+        self.bins = bins
+        self._bin_size = 2 / bins
+        # Net objects by bin, each keyed by id() like the bin and direction
+        # cosines below, as equal net objects hash alike.
+        self._netobjs = defaultdict(dict)
+        self._directions = {}
+        # Centre direction and angular radius of each bin, once needed.
+        self._bin_shapes = {}
+
+    def __len__(self):
+        return len(self._directions)
+
+    def _bin(self, x, y):
+        last = self.bins - 1
+        return (max(0, min(last, floor((x + 1) / self._bin_size))),
+                max(0, min(last, floor((y + 1) / self._bin_size))))
+
+    @staticmethod
+    def _unprojected(x, y):
+        '''Convert equal area coordinates back to direction cosines.'''
+        # Points beyond the rim are moved onto it.
+        radius_squared = min(1, x * x + y * y)
+        scale = sqrt(2 - radius_squared) / max(1, hypot(x, y))
+        return y * scale, x * scale, 1 - radius_squared
+
+    def _bin_shape(self, col, row):
+        try:
+            return self._bin_shapes[col, row]
+        except KeyError:
+            pass
+        x_0, y_0 = col * self._bin_size - 1, row * self._bin_size - 1
+        # Parts of bins on the rim lie outside the net; they are moved onto
+        # the rim, which is still within the radius of the rest of the bin.
+        centre = self._unprojected(x_0 + self._bin_size / 2,
+                                   y_0 + self._bin_size / 2)
+        steps = 4
+        radius = max(
+            axial_angle(centre, self._unprojected(
+                x_0 + self._bin_size * i / steps,
+                y_0 + self._bin_size * j / steps))
+            for i in range(steps + 1) for j in range(steps + 1)
+            if i in (0, steps) or j in (0, steps))
+        # Allow for the bin's edges bulging between the points sampled.
+        shape = self._bin_shapes[col, row] = centre, radius * 1.1
+        return shape
+
+    def add(self, netobjs):
+        '''Index many Lines or Planes at once.'''
+        netobjs = list(netobjs)
+        cosines = DirectionCosinesArray.from_direction_cosines(
+            netobj.direction_cosines() for netobj in netobjs)
+        # Flip vectors into the lower hemisphere, which the bins cover.
+        for i, down in enumerate(cosines.down):
+            if down < 0:
+                cosines.north[i], cosines.east[i], cosines.down[i] = \
+                    -cosines.north[i], -cosines.east[i], -down
+        math_xs, math_ys = EqualAreaProjection.direction_cosines_coordinates(
+            cosines)
+        for netobj, x, y, direction in zip(netobjs, math_xs, math_ys,
+                                           cosines.normalised()):
+            key = id(netobj)
+            if key in self._directions:
+                self.remove((netobj,))
+            cell = self._bin(x, y)
+            self._netobjs[cell][key] = netobj
+            self._directions[key] = cell, direction
+
+    def remove(self, netobjs):
+        '''Stop indexing net objects; skip those that aren't indexed.'''
+        for netobj in netobjs:
+            cell, _ = self._directions.pop(id(netobj), (None, None))
+            if cell is None:
+                continue
+            cell_netobjs = self._netobjs[cell]
+            del cell_netobjs[id(netobj)]
+            if not cell_netobjs:
+                del self._netobjs[cell]
+
+    def clear(self):
+        '''Stop indexing all net objects.'''
+        self._netobjs.clear()
+        self._directions.clear()
+
+    def attach(self, group):
+        '''Index a DataGroup's net objects, following its changes.'''
+        self.add(group.net_objects())
+        group.bind(add_items=self._on_add_items,
+                   remove_items=self._on_remove_items)
+
+    def detach(self, group):
+        '''Stop following a DataGroup and forget its net objects.'''
+        group.unbind(add_items=self._on_add_items,
+                     remove_items=self._on_remove_items)
+        self.remove(group.net_objects())
+
+    def _on_add_items(self, _, netobjs):
+        self.add(netobjs)
+
+    def _on_remove_items(self, _, netobjs):
+        self.remove(netobjs)
+
+    def _cone_items(self, cosines, angle):
+        '''Find (angle from axis, net object) pairs within the cone.'''
+        length = sqrt(sum(c * c for c in cosines))
+        cosines = tuple(c / length for c in cosines)
+        found = []
+        north, east, down = cosines
+        # Compare cosines rather than angles, saving an acos per net object.
+        min_dot = cos(angle) if angle < pi / 2 else -1
+        for cell, cell_netobjs in self._netobjs.items():
+            centre, radius = self._bin_shape(*cell)
+            # The angle between axes accounts for each axis' antipode, so
+            # cones near the rim reach round to the other side of the net.
+            if axial_angle(cosines, centre) > angle + radius:
+                continue
+            for key, netobj in cell_netobjs.items():
+                other_north, other_east, other_down = self._directions[key][1]
+                dot = abs(north * other_north + east * other_east +
+                          down * other_down)
+                if dot >= min_dot:
+                    found.append((acos(min(1, dot)), netobj))
+        return found
+
+    def cone(self, cosines, angle):
+        '''Find net objects within angle (in radians) of an axis.
+
+        The axis is given by its direction cosines, e.g. those of a Line.
+        Net objects are sorted by their angle from the axis.
+        '''
+        found = self._cone_items(cosines, angle)
+        found.sort(key=lambda item: item[0])
+        return [netobj for _, netobj in found]
+
+    def nearest(self, cosines, count=1):
+        '''Find the count net objects closest to an axis, closest first.'''
+        angle = self._bin_size
+        while True:
+            found = self._cone_items(cosines, angle)
+            # Everything is within pi/2 of any axis.
+            if len(found) >= count or angle >= pi / 2:
+                break
+            angle *= 2
+        return [netobj for _, netobj in nsmallest(
+            count, found, key=lambda item: item[0])]
+
+    def bin_counts(self):
+        '''Count net objects per bin.
+
+        Returns a dict of counts by the direction cosines of each bin's
+        centre, as (north, east, down) tuples, leaving out empty bins. All
+        bins have the same area, except those cut by the rim of the net.
+        '''
+        return {self._bin_shape(*cell)[0]: len(cell_netobjs)
+                for cell, cell_netobjs in self._netobjs.items()}
@@ -1,11 +1,73 @@
 '''Stereonet projections of planes and lines.'''
 
 import abc
-import itertools as it
+import base64
+import time
 import tkinter as tk
-from math import sqrt, pi, sin, cos, tan
+from array import array
+from collections import OrderedDict, defaultdict, deque
+from math import radians, fsum, log10, log2, ceil
 
-from transformation import Plane, Line, Rotation
+from transformation import Line, Circle
+from raster import PointRaster, png_bytes
+from spatial import GridIndex
+from projections import (GUIDE_TOLERANCE, Projection, EqualAngleProjection,
+                         EqualAreaProjection, latitude_guide, dip_guide,
+                         flat_coordinates)
+from render import LINE_OPTIONS, PLANE_OPTIONS
+
+# Number of projected curves that a ProjectionCache keeps by default.
+PROJECTION_CACHE_SIZE = 20000
+# Canvas tag given to all guide lines.
+GUIDE_TAG = 'guide'
+# Groups of at least this many lines are drawn as one image by default.
+RASTER_THRESHOLD = 20000
+# Canvas tag given to all images of rasterised lines.
+RASTER_TAG = 'raster'
+# Opacity of each single point in a raster image.
+RASTER_POINT_ALPHA = .35
+# Groups of at least this many lines are drawn as one marker per cell.
+DETAIL_THRESHOLD = 5000
+# Canvas tag given to all markers of lines in DetailLayers.
+DETAIL_TAG = 'detail'
+# Net objects react to the mouse pointer this many pixels beyond their edge.
+HIT_TOLERANCE = 2
+# Canvas tag of the rectangle or lasso drawn while selecting net objects.
+RUBBER_BAND_TAG = 'rubber-band'
+# A RedrawScheduler redraws at most this many times per second by default...
+MAX_REDRAW_RATE = 30
+# ...and plots net objects in chunks of this many between time checks.
+REDRAW_CHUNK_SIZE = 500
+# Hidden nets start catching up after this many milliseconds without changes.
+CATCH_UP_DELAY = 1000
+# Nets can be magnified up to this factor...
+MAX_ZOOM = 64
+# ...by this factor per step of the mouse wheel.
+ZOOM_STEP = 1.25
+# Milliseconds after the last zoom or pan until the view is brought up to date.
+VIEW_UPDATE_DELAY = 100
+# Canvas items created per call of the Tcl procedure below.
+CREATE_ITEMS_CHUNK_SIZE = 10000
+# Tcl procedure creating many canvas items of one type and options at once.
+CREATE_ITEMS_COMMAND = 'stereonet_create_items'
+CREATE_ITEMS_PROC = '''
+proc %s {canvas type coords_list args} {
+    set ids {}
+    foreach coords $coords_list {
+        lappend ids [$canvas create $type {*}$coords {*}$args]
+    }
+    return $ids
+}
+''' % CREATE_ITEMS_COMMAND
+# Tcl procedure moving many canvas items at once.
+MOVE_ITEMS_COMMAND = 'stereonet_move_items'
+MOVE_ITEMS_PROC = '''
+proc %s {canvas ids coords_list} {
+    foreach id $ids coords $coords_list {
+        $canvas coords $id $coords
+    }
+}
+''' % MOVE_ITEMS_COMMAND
 
 
 def updated_dict(original, new_values):
@@ -21,40 +83,488 @@ def updated_dict(original, new_values):
     return original
 
 
+def create_items(interpreter, canvas_path, item_type, coords_list, options):
+    '''Create canvas items in a few calls to the Tcl interpreter.
+
+    CREATE_ITEMS_PROC must have been evaluated in the interpreter before.
+    Each element of coords_list holds the coordinates of one item; options
+    are flat Tcl options, e.g. ('-fill', 'red'). Returns a list of item IDs.
+    '''
+    ids = []
+    for start in range(0, len(coords_list), CREATE_ITEMS_CHUNK_SIZE):
+        ids.extend(map(int, interpreter.splitlist(interpreter.call(
+            CREATE_ITEMS_COMMAND, canvas_path, item_type,
+            coords_list[start:start + CREATE_ITEMS_CHUNK_SIZE], *options))))
+    return ids
+
+
+def move_items(interpreter, canvas_path, ids, coords_list):
+    '''Set the coordinates of canvas items in a few calls to the Tcl
+    interpreter.
+
+    MOVE_ITEMS_PROC must have been evaluated in the interpreter before. Each
+    element of coords_list holds the new coordinates of the item in ids at
+    the same index.
+    '''
+    for start in range(0, len(ids), CREATE_ITEMS_CHUNK_SIZE):
+        end = start + CREATE_ITEMS_CHUNK_SIZE
+        interpreter.call(MOVE_ITEMS_COMMAND, canvas_path, ids[start:end],
+                         coords_list[start:end])
+
+
+class PointLayer(metaclass=abc.ABCMeta):
+    '''Lines that are drawn together rather than as one oval each.
+
+    Coordinates are kept in mathematical space so the layer can be redrawn at
+    any net size or style. All canvas items of a layer carry its own tag.
+    '''
+
+    def __init__(self, lines, math_xs, math_ys, options):
+        self.lines = list(lines)
+        self.math_xs, self.math_ys = array('d', math_xs), array('d', math_ys)
+        self.options = options
+        tags = options.get('tags', ())
+        # Tags of the layer's items, as given in options, and the layer's own.
+        self.tags = (tags,) if isinstance(tags, str) else tuple(tags)
+        self.tag = 'layer-{}'.format(id(self))
+        # The net's view_state() when the layer was last rendered.
+        self.view = None
+
+    def remove(self, lines):
+        '''Stop drawing lines; they are only gone after the next render.'''
+        # Equal lines hash alike, so look them up by id().
+        removed = set(map(id, lines))
+        kept = [i for i, line in enumerate(self.lines)
+                if id(line) not in removed]
+        self.lines = [self.lines[i] for i in kept]
+        self.math_xs = array('d', [self.math_xs[i] for i in kept])
+        self.math_ys = array('d', [self.math_ys[i] for i in kept])
+
+    @abc.abstractmethod
+    def render(self, net):
+        '''Draw all lines on net, replacing what was drawn before.'''
+        raise NotImplementedError
+
+    def restyle(self, net, options):
+        '''Remember new options for later renders on net.
+
+        Net.restyle_tag applies them to existing canvas items.
+        '''
+        self.options = updated_dict(self.options, options)
+
+
+class RasterLayer(PointLayer):
+    '''Lines that are drawn into one image instead of as separate ovals.'''
+
+    def __init__(self, lines, math_xs, math_ys, options):
+        super().__init__(lines, math_xs, math_ys, options)
+        self.item = self.image = None
+
+    def render(self, net):
+        '''Draw lines in view as an image on net, or update the existing one.
+        '''
+        size = net.size
+        self.view = net.view_state()
+        x_0, y_0, _, _ = net.visible_region()
+        points = PointRaster(size, size)
+        # pylint: disable=protected-access
+        points.add_points(net._to_screen_coords_array(
+            self.math_xs, self.math_ys), x_0, y_0)
+        # winfo_rgb returns 16 bits per channel.
+        rgb = [value >> 8 for value in net.winfo_rgb(self.options['fill'])]
+        rgba = points.to_rgba(rgb, RASTER_POINT_ALPHA, net.point_radius)
+        # Keep a reference to the image, or Tk will forget what it shows.
+        self.image = tk.PhotoImage(master=net, format='png',
+                                   data=base64.b64encode(
+                                       png_bytes(size, size, rgba)))
+        if self.item is None:
+            self.item = net.create_image(
+                x_0, y_0, image=self.image, anchor=tk.NW,
+                state=self.options.get('state', tk.NORMAL),
+                tags=self.tags + (self.tag, RASTER_TAG))
+        else:
+            net.itemconfigure(self.item, image=self.image)
+            net.coords(self.item, x_0, y_0)
+
+    def restyle(self, net, options):
+        '''Remember new options and redraw the image in the new style.'''
+        super().restyle(net, options)
+        self.render(net)
+
+
+class DetailLayer(PointLayer):
+    '''Lines that are drawn as one marker for all lines close together.
+
+    Lines are grouped by the square cells of one point diameter that they
+    fall into, and each cell is drawn as one oval at its lines' mean position,
+    larger for cells that hold more lines. So the number of canvas items
+    depends on the net's size rather than on the number of lines.
+    '''
+
+    def render(self, net):
+        '''Draw one marker per occupied cell in view, replacing any drawn
+        before.'''
+        # Keep items hidden if they were hidden, e.g. by set_tag_hidden.
+        state = net.itemcget(self.tag, 'state') if net.find_withtag(
+            self.tag) else self.options.get('state', tk.NORMAL)
+        net.delete(self.tag)
+        self.view = net.view_state()
+        point_r = net.point_radius
+        cell_size = 2 * point_r + 1
+        # pylint: disable=protected-access,invalid-name
+        coords = net._to_screen_coords_array(self.math_xs, self.math_ys)
+        # Markers may reach a cell beyond the ones in view.
+        x_0, y_0, x_1, y_1 = net.visible_region()
+        x_0, y_0, x_1, y_1 = (x_0 - cell_size, y_0 - cell_size,
+                              x_1 + cell_size, y_1 + cell_size)
+        cells = {}
+        for x, y in zip(coords[0::2], coords[1::2]):
+            if not (x_0 <= x <= x_1 and y_0 <= y <= y_1):
+                continue
+            cell = int(x // cell_size), int(y // cell_size)
+            try:
+                cells[cell].append((x, y))
+            except KeyError:
+                cells[cell] = [(x, y)]
+        markers = []
+        for points in cells.values():
+            count = len(points)
+            x = fsum(x for x, _ in points) / count
+            y = fsum(y for _, y in points) / count
+            # Marker area grows slowly with the number of lines.
+            radius = min(point_r * (1 + log10(count)), cell_size)
+            markers.append((x - radius, y - radius,
+                            x + radius + 1, y + radius + 1))
+        net.create_items('oval', markers, **updated_dict(self.options, {
+            'tags': self.tags + (self.tag, DETAIL_TAG), 'state': state}))
+
+
+class ProjectionCache:
+    '''Remembers where curves were projected, for reuse between nets.
+
+    Only curves are cached, as they take many samples to project; lines are
+    cheaper to project again in bulk than to look up one by one. Entries are
+    keyed by projection (i.e. Stereonet subclass), the curve's identity and a
+    level of detail, and hold coordinates in mathematical space, so they stay
+    valid when a net is resized. Once more than maxsize entries are stored,
+    the least recently used ones are evicted.
+    '''
+
+    def __init__(self, maxsize=PROJECTION_CACHE_SIZE):
+        self.maxsize = maxsize
+        # Entries hold their curve, so its id() can't be reused meanwhile.
+        self._entries = OrderedDict()
+        self._keys_by_netobj = defaultdict(set)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, projection, netobj, detail):
+        '''Return cached coordinates, or None if there are none.'''
+        key = projection, id(netobj), detail
+        try:
+            self._entries.move_to_end(key)
+        except KeyError:
+            return None
+        return self._entries[key][1]
+
+    def put(self, projection, netobj, coordinates, detail):
+        '''Store coordinates, evicting old entries if necessary.'''
+        key = projection, id(netobj), detail
+        self._entries[key] = netobj, coordinates
+        self._entries.move_to_end(key)
+        self._keys_by_netobj[id(netobj)].add(key)
+        while len(self._entries) > self.maxsize:
+            old_key, _ = self._entries.popitem(last=False)
+            self._forget_key(old_key)
+
+    def invalidate(self, netobj):
+        '''Drop all cached coordinates of the given net object.'''
+        for key in self._keys_by_netobj.pop(id(netobj), ()):
+            del self._entries[key]
+
+    def clear(self):
+        '''Drop all cached coordinates.'''
+        self._entries.clear()
+        self._keys_by_netobj.clear()
+
+    def _forget_key(self, key):
+        _, netobj_id, _ = key
+        netobj_keys = self._keys_by_netobj[netobj_id]
+        netobj_keys.discard(key)
+        if not netobj_keys:
+            del self._keys_by_netobj[netobj_id]
+
+
+def _plot_lines(net, lines, **options):
+    '''Plot lines on net; RedrawScheduler batches them apart from curves.'''
+    net.plot_lines(lines, **options)
+
+
+class RedrawScheduler:
+    '''Batches changes to stereonets and applies them when Tk is idle.
+
+    Changes are queued in order for each net; consecutive plot (or remove)
+    requests for the same net and options are merged into one batch, with
+    lines batched apart from curves. Large batches of lines are drawn as
+    layers in one go; everything else is applied in chunks. Queued
+    changes are applied from an idle callback, for at most 1 / max_rate
+    seconds at a time, after which Tk may redraw before the rest follows.
+
+    Nets marked as hidden with set_visible only catch up once they are shown
+    again, or CATCH_UP_DELAY milliseconds after visible nets are up to date.
+    So e.g. a hidden notebook tab costs little while the user is busy, and
+    plotting on a hidden net and deleting again before it caught up costs
+    almost nothing.
+
+    progress is called as progress(done, total) while more than one step is
+    needed to bring visible nets up to date, and once more when they are.
+    '''
+
+    def __init__(self, widget, max_rate=MAX_REDRAW_RATE, progress=None):
+        self._widget = widget
+        self.max_rate = max_rate
+        self.progress = progress
+        # Queues of changes by net. Entries are [function, netobjs, options]
+        # for plot and remove batches, or [function, args, None] for calls.
+        self._queues = OrderedDict()
+        self._hidden = set()
+        self._pending = None
+        # Whether _pending is the delayed start of catching up hidden nets.
+        self._pending_catch_up = False
+        # Net objects applied since visible nets were last up to date, and
+        # whether progress has been reported since then.
+        self._done, self._reported = 0, False
+
+    def __len__(self):
+        '''Count the net objects still waiting to be plotted or removed.'''
+        return sum(self._queued(net) for net in self._queues)
+
+    def _queued(self, net):
+        return sum(len(items) for _, items, options in self._queues[net]
+                   if options is not None)
+
+    def set_visible(self, net, visible=True):
+        '''Tell whether net can be seen, so should be kept up to date first.'''
+        if visible:
+            self._hidden.discard(net)
+            if self._queues.get(net):
+                # Catch up on what changed while it was hidden.
+                self._schedule(net)
+        else:
+            self._hidden.add(net)
+
+    def plot(self, net, netobjs, **options):
+        '''Plot the given net objects on net, as net.plot_all would.'''
+        lines, others = [], []
+        for netobj in netobjs:
+            if isinstance(netobj, Line):
+                lines.append(netobj)
+            else:
+                others.append(netobj)
+        # Lines are batched on their own, so large groups of them can be
+        # drawn as layers in one go, while curves are still drawn in chunks.
+        self._enqueue(net, _plot_lines, lines, options)
+        self._enqueue(net, Stereonet.plot_all, others, options)
+
+    def remove(self, net, netobjs):
+        '''Remove the given net objects from net, if they are plotted.'''
+        self._enqueue(net, Stereonet.remove_net_objects, netobjs, {})
+
+    def delete_tag(self, net, tag):
+        '''Remove net objects plotted with tag, including queued ones.'''
+        queue = self._queues.get(net, ())
+        # Don't bother plotting what would be deleted straight away.
+        for entry in list(queue):
+            if entry[0] in (_plot_lines, Stereonet.plot_all) and \
+               entry[2].get('tags') == tag:
+                queue.remove(entry)
+        self.call(net, Stereonet.delete_tag, net, tag)
+
+    def call(self, net, function, *args):
+        '''Call function(*args) once the changes queued for net are done.'''
+        self._queues.setdefault(net, deque()).append([function, args, None])
+        self._schedule(net)
+
+    def _enqueue(self, net, function, netobjs, options):
+        netobjs = list(netobjs)
+        if not netobjs:
+            return
+        queue = self._queues.setdefault(net, deque())
+        if queue and queue[-1][0] is function and queue[-1][2] == options:
+            queue[-1][1].extend(netobjs)
+        else:
+            queue.append([function, netobjs, options])
+        self._schedule(net)
+
+    def _schedule(self, net):
+        '''Make sure that changes just queued for net are applied.'''
+        if self._pending is not None:
+            if not self._pending_catch_up or net in self._hidden:
+                return
+            # Visible nets shouldn't wait for hidden ones.
+            self._cancel()
+        self._pending = self._widget.after_idle(self._run)
+
+    def _cancel(self):
+        if self._pending is not None:
+            self._widget.after_cancel(self._pending)
+        self._pending, self._pending_catch_up = None, False
+
+    def flush(self):
+        '''Apply all queued changes now, e.g. before exporting nets.'''
+        self._cancel()
+        self._run(deadline=None)
+
+    def _next_queue(self):
+        '''Find the queue to work on next, preferring visible nets.'''
+        hidden_queue = None
+        for net, queue in self._queues.items():
+            if not queue:
+                continue
+            if net not in self._hidden:
+                return net, queue
+            if hidden_queue is None:
+                hidden_queue = net, queue
+        return hidden_queue
+
+    def _report_progress(self, up_to_date):
+        if not self.progress:
+            return
+        if up_to_date:
+            if self._reported:
+                self.progress(self._done, self._done)
+            self._done, self._reported = 0, False
+        else:
+            remaining = sum(self._queued(net) for net in self._queues
+                            if net not in self._hidden)
+            self.progress(self._done, self._done + remaining)
+            self._reported = True
+
+    def _run(self, deadline=0, catch_up=False):
+        '''Apply queued changes until the deadline (a time.monotonic()).
+
+        The default deadline of 0 means one step of 1 / max_rate seconds; a
+        deadline of None means until all queues are empty. Hidden nets are
+        only updated if catch_up is true or there is no deadline.
+        '''
+        self._pending, self._pending_catch_up = None, False
+        if deadline == 0:
+            deadline = time.monotonic() + 1 / self.max_rate
+        # Always apply at least one change, so slow steps still progress.
+        applied = False
+        while True:
+            next_queue = self._next_queue()
+            if next_queue is None:
+                break
+            if deadline is not None and not catch_up and \
+               next_queue[0] in self._hidden:
+                self._pending = self._widget.after(CATCH_UP_DELAY, self._run,
+                                                   0, True)
+                self._pending_catch_up = True
+                self._report_progress(up_to_date=True)
+                return
+            if deadline is not None and applied and \
+               time.monotonic() >= deadline:
+                # Let Tk redraw and handle input before going on.
+                self._pending = self._widget.after(
+                    int(1000 / self.max_rate), self._run, 0, catch_up)
+                if next_queue[0] not in self._hidden:
+                    self._report_progress(up_to_date=False)
+                return
+            net, queue = next_queue
+            function, items, options = queue[0]
+            applied = True
+            if options is None:
+                queue.popleft()
+                function(*items)
+                continue
+            chunk_size = REDRAW_CHUNK_SIZE
+            if function is _plot_lines and len(items) >= min(
+                    net.raster_threshold, net.detail_threshold):
+                # Large groups of lines are drawn as layers, all in one go.
+                chunk_size = len(items)
+            chunk = items[:chunk_size]
+            del items[:chunk_size]
+            if not items:
+                queue.popleft()
+            function(net, chunk, **options)
+            if net not in self._hidden:
+                self._done += len(chunk)
+        self._report_progress(up_to_date=True)
+
+
 # pylint: disable=too-many-ancestors
-class Stereonet(tk.Canvas, metaclass=abc.ABCMeta):
+class Stereonet(tk.Canvas, Projection):
     '''Represents an abstract stereonet, including drawing code.
 
-    Coordinate transformations must be implemented in subclasses.
+    Coordinate transformations come from a Projection in subclasses.
     '''
 
     def __init__(self, master, line_options=None, plane_options=None, *,
-                 size=750, background='white'):
+                 size=750, background='white', curve_tolerance=.5,
+                 projection_cache=None, raster_threshold=RASTER_THRESHOLD,
+                 detail_threshold=DETAIL_THRESHOLD):
         super().__init__(master, bg=background, height=size, width=size)
         self._size = size
+        # Canvas item IDs by net object, and the other way around.
+        self._items = {}
+        # Maximum distance in pixels between plotted and true curves.
+        self.curve_tolerance = curve_tolerance
+        # Pass the same cache to several nets to share it between them.
+        if projection_cache is None:
+            projection_cache = ProjectionCache()
+        self.projection_cache = projection_cache
+        # Canvas item IDs by id() of net objects, as equal net objects hash
+        # alike; like the other net object keys below.
         self._netobjs, self._callbacks = {}, {}
+        # plot_lines draws at least this many lines at once as one image, or
+        # at least detail_threshold lines as one marker per cell.
+        self.raster_threshold = raster_threshold
+        self.detail_threshold = detail_threshold
+        # PointLayers by their own tag, and by each line they draw.
+        self._layers, self._layer_lines = {}, {}
+        # Where net objects are, for finding them under the mouse pointer.
+        self.spatial_index = GridIndex()
+        # The net object that the mouse pointer is currently over.
+        self._hover = None
+        # Screen coordinates of the rubber band being drawn, if any.
+        self._rubber_band = None
+        # Magnification of the net; the view is scrolled to pan it.
+        self._zoom = 1
+        # Curves sampled for the current detail extent and points drawn at
+        # their usual size (others were only scaled), curves sampled at a
+        # fixed number of samples (which scaling keeps exact), and the
+        # pending update of the view, if any.
+        self._refreshed, self._sized_points = set(), set()
+        self._fixed_curves = set()
+        self._view_update = None
+        self._sampled_extent = self._detail_extent
+        # Spacing, cache directory and tolerance of the plotted guides.
+        self._guides = None
 
-        self._line_options = {
-            'width': 1,  # outline thickness
-            'fill': 'green',
-            'outline': 'darkgreen',
-            'activefill': 'red',
-            'activeoutline': 'darkred',
-        }
+        self._line_options = LINE_OPTIONS.copy()
         if line_options:
             self._line_options.update(line_options)
-        self._plane_options = {
-            'width': 2,
-            'fill': 'blue',
-            'activefill': 'red',
-            'activewidth': 3,
-            'disabledwidth': 1,
-            'disabledfill': 'gray',
-        }
+        self._plane_options = PLANE_OPTIONS.copy()
         if plane_options:
             self._plane_options.update(plane_options)
 
+        self.tk.eval(CREATE_ITEMS_PROC)
+        self.tk.eval(MOVE_ITEMS_PROC)
         self.bind('<Configure>', self._resize_all)
+        # Find net objects under the pointer using the spatial index, rather
+        # than binding events of every canvas item.
+        self.bind('<Motion>', self._track_hover, add=True)
+        self.bind('<Leave>', self._track_hover, add=True)
+        # Zoom with the mouse wheel (<Button-4/5> on X11) and pan by dragging
+        # with the middle mouse button.
+        for event_code in '<MouseWheel>', '<Button-4>', '<Button-5>':
+            self.bind(event_code, self._on_mouse_wheel, add=True)
+        self.bind('<ButtonPress-2>',
+                  lambda event: self.scan_mark(event.x, event.y), add=True)
+        self.bind('<B2-Motion>', self._on_pan, add=True)
+        self.bind('<Double-Button-2>', lambda _: self.reset_view(), add=True)
 
     @property
     def point_radius(self):
@@ -71,12 +581,204 @@ class Stereonet(tk.Canvas, metaclass=abc.ABCMeta):
             # <Configure> handler (_resize_all) will set self._size.
             self.configure(width=value, height=value)
 
+    @property
+    def _half_extent(self):
+        '''Screen distance of mathematical coordinates 0 and 1 at this zoom.'''
+        return self._size * self._zoom / 2
+
+    @property
+    def _detail_extent(self):
+        '''Screen extent of the whole net, rounded up to a power of 2.
+
+        Curves are sampled for this extent, so they only need sampling again
+        once it changes, and fewer sampled curves need caching.
+        '''
+        return 2**ceil(log2(self._size * self._zoom))
+
     def _resize_all(self, event):
         old_size, new_size = self._size, min(event.width, event.height)
-        for widget in self._netobjs.values():
-            self.coords(widget, tuple(c * new_size / old_size
-                                      for c in self.coords(widget)))
+        if new_size == old_size:
+            # E.g. the window moved.
+            return
+        centre = self.view_centre()
         self._size = new_size
+        self._rescale(new_size / old_size)
+        self.set_view(self._zoom, *centre)
+
+    def _rescale(self, factor):
+        '''Bring all canvas items to the current size and zoom of the net.
+
+        One call scales all items, however many there are. They are only
+        scaled here; update_view draws points in view at their usual size
+        again, and curves and point layers if their level of detail changed.
+        '''
+        self.scale(tk.ALL, 0, 0, factor, factor)
+        self._sized_points.clear()
+        if self._detail_extent != self._sampled_extent:
+            self._sampled_extent = self._detail_extent
+            self._refreshed.clear()
+
+    @property
+    def zoom(self):
+        '''Magnification of the net, where 1 shows the whole net.'''
+        return self._zoom
+
+    def visible_region(self):
+        '''Get the screen coordinates of the view's corners, x_0, y_0, x_1,
+        y_1, where x_0 < x_1 and y_0 < y_1.'''
+        x_0, y_0 = self.canvasx(0), self.canvasy(0)
+        return x_0, y_0, x_0 + self._size, y_0 + self._size
+
+    def view_centre(self):
+        '''Get the mathematical coordinates shown in the view's centre.'''
+        x_0, y_0, x_1, y_1 = self.visible_region()
+        return self._to_math_coords((x_0 + x_1) / 2, (y_0 + y_1) / 2)
+
+    def set_view(self, zoom=1, centre_x=0, centre_y=0):
+        '''Magnify the net by zoom and show the given mathematical point in
+        the view's centre, as far as possible.
+
+        Canvas items are scaled straight away. After VIEW_UPDATE_DELAY ms
+        without further changes to the view, points in view are drawn at
+        their usual size again, and curves in view are sampled again if the
+        zoom changed their level of detail; others follow when they come into
+        view.
+        '''
+        zoom = max(1, min(MAX_ZOOM, zoom))
+        if zoom != self._zoom:
+            old_zoom, self._zoom = self._zoom, zoom
+            self._rescale(zoom / old_zoom)
+        extent = self._size * zoom
+        self.configure(scrollregion=(0, 0, extent, extent))
+        # Tk keeps the view within the scroll region, i.e. on the net.
+        self.xview_moveto((centre_x + 1) / 2 - 1 / (2 * zoom))
+        self.yview_moveto((1 - centre_y) / 2 - 1 / (2 * zoom))
+        self._schedule_view_update()
+
+    def zoom_at(self, factor, x, y):
+        '''Zoom by factor, keeping the point at view coordinates (x, y).'''
+        math_x, math_y = self._to_math_coords(self.canvasx(x),
+                                              self.canvasy(y))
+        zoom = max(1, min(MAX_ZOOM, self._zoom * factor))
+        half_extent = self._size * zoom / 2
+        self.set_view(zoom, math_x - (x - self._size / 2) / half_extent,
+                      math_y + (y - self._size / 2) / half_extent)
+
+    def reset_view(self):
+        '''Show the whole net again.'''
+        self.set_view(1)
+
+    def _on_mouse_wheel(self, event):
+        zoom_in = event.num == 4 or (event.num != 5 and event.delta > 0)
+        self.zoom_at(ZOOM_STEP if zoom_in else 1 / ZOOM_STEP, event.x, event.y)
+
+    def _on_pan(self, event):
+        self.scan_dragto(event.x, event.y, gain=1)
+        self._schedule_view_update()
+
+    def _schedule_view_update(self):
+        if self._view_update is not None:
+            self.after_cancel(self._view_update)
+        self._view_update = self.after(VIEW_UPDATE_DELAY, self.update_view)
+
+    def view_state(self):
+        '''Get what drawing the current view depends on: the net's size,
+        zoom and visible region.'''
+        return self._size, self._zoom, self.visible_region()
+
+    def update_view(self):
+        '''Draw what changed in the current view at its level of detail.
+
+        Points in view are drawn at their usual size if they were scaled,
+        curves in view are sampled again if they were sampled for another
+        detail extent, guides are drawn from a finer table if needed, and
+        point layers are drawn for the visible region if it changed. Net
+        objects out of view are found with spatial_index and skipped.
+        '''
+        if self._view_update is not None:
+            self.after_cancel(self._view_update)
+            self._view_update = None
+        x_0, y_0, x_1, y_1 = self.visible_region()
+        lines, point_items = [], []
+        for netobj in self.spatial_index.overlapping(
+                *self._to_math_coords(x_0, y_1),
+                *self._to_math_coords(x_1, y_0)):
+            item = self._netobjs.get(id(netobj))
+            if item is None:
+                continue
+            if isinstance(netobj, Line):
+                if id(netobj) not in self._sized_points:
+                    lines.append(netobj)
+                    point_items.append(item)
+            elif id(netobj) not in self._refreshed and \
+                 id(netobj) not in self._fixed_curves:
+                self.coords(item, self.rotation_coordinates(netobj).tolist())
+                self._refreshed.add(id(netobj))
+        if lines:
+            coords = self._to_screen_coords_array(
+                *self.lines_coordinates(lines))
+            point_r = self.point_radius
+            # pylint: disable=invalid-name
+            move_items(self.tk, self._w, point_items, [
+                (x - point_r, y - point_r, x + point_r + 1, y + point_r + 1)
+                for x, y in zip(coords[0::2], coords[1::2])])
+            self._sized_points.update(map(id, lines))
+        if self._guides is not None and \
+           self._guides[2] != self._guide_tolerance():
+            self.plot_guides(*self._guides[:2])
+        view = self.view_state()
+        for layer in self._layers.values():
+            if layer.view != view:
+                layer.render(self)
+
+    def set_tag_hidden(self, tag, hidden=True):
+        '''Hide (or show again) all items with the given tag at once.'''
+        self.itemconfigure(tag, state=tk.HIDDEN if hidden else tk.NORMAL)
+
+    def restyle_tag(self, tag, **options):
+        '''Change options of all items with the given tag at once.
+
+        For example, restyle_tag(tag, fill='red') recolours both points and
+        curves tagged with tag.
+        '''
+        layers = self._tagged_layers(tag)
+        for layer in layers:
+            layer.restyle(self, options)
+        if any(isinstance(layer, RasterLayer) for layer in layers):
+            # Images don't take fill etc.; they were redrawn instead.
+            self.itemconfigure('({})&&!{}'.format(tag, RASTER_TAG), **options)
+        else:
+            self.itemconfigure(tag, **options)
+
+    def delete_tag(self, tag):
+        '''Remove all net objects plotted with the given tag at once.'''
+        for item in self.find_withtag(tag):
+            netobj = self._items.pop(item, None)
+            if netobj is not None:
+                del self._netobjs[id(netobj)]
+                self._forget_netobj(netobj)
+        for layer in self._tagged_layers(tag):
+            self._forget_layer(layer)
+        self.delete(tag)
+
+    def _tagged_layers(self, tag):
+        return [layer for layer in self._layers.values()
+                if tag in layer.tags or tag == layer.tag]
+
+    def _forget_layer(self, layer):
+        del self._layers[layer.tag]
+        for line in layer.lines:
+            del self._layer_lines[id(line)]
+            self._forget_netobj(line)
+
+    def _forget_netobj(self, netobj):
+        '''Stop finding netobj under the mouse pointer.'''
+        self.spatial_index.remove(netobj)
+        self._refreshed.discard(id(netobj))
+        self._sized_points.discard(id(netobj))
+        self._fixed_curves.discard(id(netobj))
+        if self._hover is netobj:
+            self._hover = None
 
     def bind_netobject(self, event_code, command):
         '''Register a callback for the specified event code on each net object.
@@ -87,63 +789,302 @@ class Stereonet(tk.Canvas, metaclass=abc.ABCMeta):
         The callback will be called as command(event, netobj), with netobj being
         the net object (Plane or Line) that triggered the event.
         '''
-        if event_code not in self._callbacks:
-            self._bind_all_netobjs(event_code)
+        if event_code not in self._callbacks and \
+           event_code not in ('<Enter>', '<Leave>'):
+            # <Enter> and <Leave> are emulated by _track_hover instead.
+            self.bind(event_code, lambda event: self._dispatch(
+                event_code, self.netobj_at_event(event), event), add=True)
         self._callbacks.setdefault(event_code, []).append(command)
 
-    def _bind_all_events(self, netobj, widget):
-        for event_code in self._callbacks:
-            self._bind_handler(event_code, netobj, widget)
+    def _register_item(self, netobj, widget):
+        '''Remember which canvas item shows which net object.'''
+        self._netobjs[id(netobj)] = widget
+        self._items[widget] = netobj
 
-    def _bind_all_netobjs(self, event_code):
-        for netobj, widget in self._netobjs.items():
-            self._bind_handler(event_code, netobj, widget)
+    def _item_of(self, netobj):
+        '''Find the canvas item showing netobj, which may be an image.'''
+        try:
+            return self._netobjs[id(netobj)]
+        except KeyError:
+            return self._layer_lines[id(netobj)].tag
+
+    def _reacts_to_pointer(self, netobj):
+        return self.itemcget(self._item_of(netobj), 'state') not in (
+            tk.HIDDEN, tk.DISABLED)
+
+    def netobj_at(self, x, y):
+        '''Find the net object closest to screen point (x, y), if any.
+
+        Only visible, enabled net objects up to HIT_TOLERANCE pixels beyond
+        their edge are found; Lines count as points of radius point_radius.
+        '''
+        return self.spatial_index.nearest(
+            *self._to_math_coords(x, y),
+            (self.point_radius + HIT_TOLERANCE) / self._half_extent,
+            self._reacts_to_pointer)
 
-    def _bind_handler(self, event_code, netobj, widget):
-        def handler(event):
-            for callback in self._callbacks.get(event_code, ()):
-                callback(event, netobj)
-        self.tag_bind(widget, event_code, handler)
+    def netobj_at_event(self, event):
+        '''Find the net object under the mouse pointer when event happened.'''
+        return self.netobj_at(self.canvasx(event.x), self.canvasy(event.y))
+
+    def _track_hover(self, event):
+        '''Emulate <Enter> and <Leave> events of net objects.'''
+        netobj = None
+        if event.type != tk.EventType.Leave:
+            netobj = self.netobj_at_event(event)
+        if netobj is self._hover:
+            return
+        if self._hover is not None:
+            self._dispatch('<Leave>', self._hover, event)
+        self._hover = netobj
+        if netobj is not None:
+            self._dispatch('<Enter>', netobj, event)
+
+    def _dispatch(self, event_code, netobj, event):
+        '''Call the callbacks for event_code, if netobj isn't None.'''
+        if netobj is None:
+            return
+        if event_code in ('<Enter>', '<Leave>'):
+            # Callbacks expect an event of the type they were bound to.
+            synthetic = tk.Event()
+            synthetic.__dict__.update(event.__dict__)
+            synthetic.type = tk.EventType.Enter if event_code == '<Enter>' \
+                else tk.EventType.Leave
+            event = synthetic
+        for callback in self._callbacks.get(event_code, ()):
+            callback(event, netobj)
+
+    def netobjs_in_rectangle(self, x_0, y_0, x_1, y_1):
+        '''Find visible net objects in the rectangle given in screen points.
+
+        Curves are found if any of their vertices lie in the rectangle.
+        '''
+        return [netobj for netobj in self.spatial_index.in_rectangle(
+            *self._to_math_coords(x_0, y_0), *self._to_math_coords(x_1, y_1))
+                if self._reacts_to_pointer(netobj)]
+
+    def netobjs_in_lasso(self, screen_coords):
+        '''Find visible net objects in the polygon given in screen points.
+
+        The polygon is given as flat alternating x and y coordinates. Curves
+        are found if any of their vertices lie in the polygon.
+        '''
+        vertices = [self._to_math_coords(x, y) for x, y in
+                    zip(screen_coords[0::2], screen_coords[1::2])]
+        return [netobj for netobj in self.spatial_index.in_polygon(vertices)
+                if self._reacts_to_pointer(netobj)]
+
+    def bind_selection(self, command, lasso=False):
+        '''Let the user select net objects by dragging a rubber band.
+
+        Dragging with the first mouse button, starting away from any net
+        object, draws a rectangle (or a freehand lasso, if lasso is true).
+        When the button is released, command is called with a list of the
+        selected net objects.
+        '''
+        def start(event):
+            if self.netobj_at_event(event) is None:
+                self._rubber_band = [self.canvasx(event.x),
+                                     self.canvasy(event.y)]
+
+        def drag(event):
+            if self._rubber_band is None:
+                return
+            x, y = self.canvasx(event.x), self.canvasy(event.y)
+            if lasso:
+                self._rubber_band.extend((x, y))
+            else:
+                self._rubber_band[2:] = x, y
+            self.delete(RUBBER_BAND_TAG)
+            if len(self._rubber_band) < 4:
+                return
+            if lasso:
+                self.create_line(*self._rubber_band, *self._rubber_band[:2],
+                                 dash=(4, 2), tags=RUBBER_BAND_TAG)
+            else:
+                self.create_rectangle(*self._rubber_band, dash=(4, 2),
+                                      tags=RUBBER_BAND_TAG)
+
+        def finish(_):
+            coords, self._rubber_band = self._rubber_band, None
+            self.delete(RUBBER_BAND_TAG)
+            if coords is None or len(coords) < 4:
+                return
+            command(self.netobjs_in_lasso(coords) if lasso
+                    else self.netobjs_in_rectangle(*coords))
+
+        self.bind('<ButtonPress-1>', start, add=True)
+        self.bind('<B1-Motion>', drag, add=True)
+        self.bind('<ButtonRelease-1>', finish, add=True)
 
     def _to_screen_coords(self, math_x, math_y):
         '''Convert mathematical coordinates to screen coordinates.'''
         # Mathematical y increases upwards, screen y increases downwards.
         math_y = -math_y
-        return (math_x + 1) * self._size / 2, (math_y + 1) * self._size / 2
+        return (math_x + 1) * self._half_extent, \
+            (math_y + 1) * self._half_extent
+
+    def _to_math_coords(self, screen_x, screen_y):
+        '''Convert screen coordinates to mathematical coordinates.'''
+        return screen_x / self._half_extent - 1, \
+            1 - screen_y / self._half_extent
+
+    def _to_screen_coords_array(self, math_xs, math_ys):
+        '''Convert arrays of mathematical coordinates to screen coordinates.
+
+        The result is a flat array of alternating x and y coordinates, as
+        Canvas.create_line expects.
+        '''
+        half_size = self._half_extent
+        coords = array('d', bytes(16 * len(math_xs)))
+        coords[0::2] = array('d', [(x + 1) * half_size for x in math_xs])
+        coords[1::2] = array('d', [(1 - y) * half_size for y in math_ys])
+        return coords
 
     def plot(self, netobj, **override_options):
         '''Plot an arbitrary net object.'''
         if isinstance(netobj, Line):
             self.plot_line(netobj, **override_options)
-        elif isinstance(netobj, Rotation):
+        elif isinstance(netobj, Circle):
             self.plot_rotation(netobj, **override_options)
         else:
             raise TypeError(type(netobj))
 
+    def plot_all(self, netobjs, **override_options):
+        '''Plot many net objects, creating their canvas items in bulk.'''
+        lines, rotations = [], []
+        for netobj in netobjs:
+            if isinstance(netobj, Line):
+                lines.append(netobj)
+            elif isinstance(netobj, Circle):
+                rotations.append(netobj)
+            else:
+                raise TypeError(type(netobj))
+        if lines:
+            self.plot_lines(lines, **override_options)
+        if rotations:
+            self.plot_rotations(rotations, **override_options)
+
+    def create_items(self, item_type, coords_list, **options):
+        '''Create many canvas items of the same type and options at once.
+
+        This is like calling e.g. create_oval(*coords, **options) for each
+        coords in coords_list, but takes only a few calls into Tcl. Returns a
+        list of the new items' IDs.
+        '''
+        return create_items(self.tk, self._w, item_type, coords_list,
+                            self._options(options))
+
     def plot_line(self, line, **override_line_options):
         '''Plot a line (represented as a point) on the stereonet.'''
-        # pylint: disable=invalid-name
-        x, y = self._to_screen_coords(*self.line_coordinates(line))
-        point_r = self.point_radius
-        # Top & left bounds are inclusive, bottom & right bounds are exclusive.
-        coords = x - point_r, y - point_r, x + point_r + 1, y + point_r + 1
+        self.plot_lines([line], **override_line_options)
+
+    def plot_lines(self, lines, **override_line_options):
+        '''Plot many lines (represented as points) on the stereonet.
+
+        All lines are projected in one batch, which is much faster than
+        plotting them one by one.
+        '''
+        lines = list(lines)
+        math_coords = self.lines_coordinates(lines)
         line_options = updated_dict(self._line_options, override_line_options)
-        self._netobjs[line] = self.create_oval(*coords, **line_options)
-        self._bind_all_events(line, self._netobjs[line])
+        if len(lines) >= self.raster_threshold:
+            self._plot_layer(RasterLayer(lines, *math_coords, line_options))
+            return
+        if len(lines) >= self.detail_threshold:
+            self._plot_layer(DetailLayer(lines, *math_coords, line_options))
+            return
+        coords = self._to_screen_coords_array(*math_coords)
+        point_r = self.point_radius
+        # pylint: disable=invalid-name
+        # Top & left bounds are inclusive, bottom & right are exclusive.
+        items = self.create_items('oval', [
+            (x - point_r, y - point_r, x + point_r + 1, y + point_r + 1)
+            for x, y in zip(coords[0::2], coords[1::2])], **line_options)
+        for line, item in zip(lines, items):
+            self._register_item(line, item)
+        self._sized_points.update(map(id, lines))
+        self.spatial_index.add_points(lines, *math_coords)
+
+    def _plot_layer(self, layer):
+        '''Plot a PointLayer, for groups too large for one oval per line.
+
+        Lines in layers still trigger callbacks bound with bind_netobject and
+        can be removed with remove_net_object or delete_tag.
+        '''
+        layer.render(self)
+        self._layers[layer.tag] = layer
+        for line in layer.lines:
+            self._layer_lines[id(line)] = layer
+        self.spatial_index.add_points(layer.lines, layer.math_xs,
+                                      layer.math_ys)
+
+    def rotation_coordinates(self, rotation, samples=None):
+        '''Calculate screen coordinates of a curve representing a rotation.
+
+        The curve is returned as one flat array of alternating x and y
+        coordinates. If samples is given, the curve is sampled at samples + 1
+        evenly spaced points; otherwise, just enough points are used to keep
+        the curve within curve_tolerance pixels of the true one.
+        '''
+        return self._to_screen_coords_array(
+            *self._rotation_math_coordinates(rotation, samples))
+
+    def _rotation_math_coordinates(self, rotation, samples=None):
+        '''Like rotation_coordinates, but in mathematical space.
 
-    def plot_rotation(self, rotation, samples=100, **override_plane_options):
-        '''Plot the rotation of a line about an axis by 180 degrees.'''
-        coords = it.chain(*(self._to_screen_coords(*self.line_coordinates(line))
-                            for line in rotation.constituent_lines(samples)))
+        Returns separate arrays of x and y coordinates.
+        '''
+        if samples is None:
+            # Nets of different sizes need different levels of detail.
+            detail = 'tolerance', 2 * self.curve_tolerance / \
+                self._detail_extent
+        else:
+            detail = 'samples', samples
+        math_coords = self.projection_cache.get(type(self), rotation, detail)
+        if math_coords is None:
+            if samples is None:
+                math_coords = self.adaptive_rotation_coordinates(
+                    rotation, detail[1])
+            else:
+                math_coords = self.direction_cosines_coordinates(
+                    rotation.constituent_direction_cosines(samples))
+            self.projection_cache.put(type(self), rotation, math_coords,
+                                      detail)
+        return math_coords
+
+    def plot_rotation(self, rotation, samples=None, **override_plane_options):
+        '''Plot the rotation of a line about an axis by 180 degrees.
+
+        See rotation_coordinates for the meaning of samples.
+        '''
+        self.plot_rotations([rotation], samples, **override_plane_options)
+
+    def plot_rotations(self, rotations, samples=None,
+                       **override_plane_options):
+        '''Plot many rotations at once; see plot_rotation.'''
+        rotations = list(rotations)
+        all_math_coords, all_coords = [], []
+        for rotation in rotations:
+            math_xs, math_ys = self._rotation_math_coordinates(rotation,
+                                                               samples)
+            all_coords.append(self._to_screen_coords_array(
+                math_xs, math_ys).tolist())
+            all_math_coords.append(flat_coordinates(math_xs, math_ys))
         plane_opts = updated_dict(self._plane_options, override_plane_options)
-        self._netobjs[rotation] = self.create_line(*coords, **plane_opts)
-        self._bind_all_events(rotation, self._netobjs[rotation])
+        items = self.create_items('line', all_coords, **plane_opts)
+        for rotation, item, math_coords in zip(rotations, items,
+                                               all_math_coords):
+            self._register_item(rotation, item)
+            self.spatial_index.add_curve(rotation, math_coords)
+        if samples is None:
+            self._refreshed.update(map(id, rotations))
+        else:
+            self._fixed_curves.update(map(id, rotations))
 
     def plot_latitude_guide(self, latitude):
         '''Show a small circle at the specified -pi/2 <= latitude <= pi/2.'''
-        assert -pi/2 <= latitude <= pi/2, latitude
-        small_circle = Rotation(Line(0, 0), Line(0, pi/2 - latitude))
-        self.plot_rotation(small_circle, state=tk.DISABLED)
+        self.plot_rotation(latitude_guide(latitude), state=tk.DISABLED)
 
     def plot_dip_guide(self, dip, left_hemisphere=False):
         '''Show a great circle at the specified 0 <= dip <= pi/2.
@@ -151,48 +1092,84 @@ class Stereonet(tk.Canvas, metaclass=abc.ABCMeta):
         Pass left_hemisphere=True to plot the guide with strike pi so that it
         appears to dip left, else it'll dip to the right.
         '''
-        assert 0 <= dip <= pi/2, dip
-        strike = pi if left_hemisphere else 0
-        great_circle = Rotation(Plane(strike, dip).pole(), Line(0, strike))
-        self.plot_rotation(great_circle, state=tk.DISABLED)
+        self.plot_rotation(dip_guide(dip, left_hemisphere), state=tk.DISABLED)
+
+    def _guide_tolerance(self):
+        '''Get the tolerance that guides are sampled to at the current zoom.
+
+        This is GUIDE_TOLERANCE, or as many halvings of it as are needed to
+        keep guides within curve_tolerance pixels of the true curves.
+        '''
+        tolerance = GUIDE_TOLERANCE
+        while tolerance > 2 * self.curve_tolerance / self._detail_extent:
+            tolerance /= 2
+        return tolerance
+
+    def plot_guides(self, spacing=radians(10), cache_dir=None):
+        '''Show a grid of latitude and dip guides with the given spacing.
+
+        Guides are drawn from the table that guide_table returns and tagged
+        with GUIDE_TAG, so they can be handled all at once. They replace any
+        guides plotted before, and are drawn again from a finer table when
+        zooming in needs one.
+        '''
+        plane_opts = updated_dict(self._plane_options,
+                                  {'state': tk.DISABLED, 'tags': GUIDE_TAG})
+        tolerance = self._guide_tolerance()
+        self._guides = spacing, cache_dir, tolerance
+        self.delete(GUIDE_TAG)
+        half_size = self._half_extent
+        all_coords = []
+        for math_coords in self.guide_table(spacing, cache_dir, tolerance):
+            coords = array('d', math_coords)
+            coords[0::2] = array('d', [(x + 1) * half_size
+                                       for x in math_coords[0::2]])
+            coords[1::2] = array('d', [(1 - y) * half_size
+                                       for y in math_coords[1::2]])
+            all_coords.append(coords.tolist())
+        self.create_items('line', all_coords, **plane_opts)
+        # Keep guides below net objects.
+        self.tag_lower(GUIDE_TAG)
+
+    def remove_net_objects(self, netobjs):
+        '''Destroy many net objects, skipping those that are not plotted.'''
+        lines_by_layer = defaultdict(list)
+        for netobj in netobjs:
+            layer = self._layer_lines.pop(id(netobj), None)
+            if layer is None:
+                self.remove_net_object(netobj)
+            else:
+                self._forget_netobj(netobj)
+                lines_by_layer[layer].append(netobj)
+        # Only redraw each layer once.
+        for layer, lines in lines_by_layer.items():
+            layer.remove(lines)
+            layer.render(self)
 
     def remove_net_object(self, netobj):
         '''Destroy the specified net object, removing it from the plot.
 
         If the object is not plotted, do nothing.
         '''
+        self._forget_netobj(netobj)
+        layer = self._layer_lines.pop(id(netobj), None)
+        if layer is not None:
+            layer.remove((netobj,))
+            layer.render(self)
+            return
         try:
-            netobj = self._netobjs[netobj]
+            item = self._netobjs.pop(id(netobj))
         except KeyError:
             # Net object not plotted.
             pass
         else:
-            self.delete(netobj)
-
-    @classmethod
-    @abc.abstractmethod
-    def line_coordinates(cls, line):
-        '''Calculate where a point representing a line should be placed.
-
-        This works in mathematical space -- x increases right, y increases up;
-        the centre of the stereonet is (0, 0).
-        '''
-        raise NotImplementedError
+            del self._items[item]
+            self.delete(item)
 
 
-class EqualAngle(Stereonet):  # pylint: disable=too-many-ancestors
+class EqualAngle(EqualAngleProjection, Stereonet):
     '''Equal angle stereonet -- preserves angles, but not areas.'''
 
-    @classmethod
-    def line_coordinates(cls, line):
-        return (tan(pi/4 - line.plunge/2) * sin(line.trend),
-                tan(pi/4 - line.plunge/2) * cos(line.trend))
 
-
-class EqualArea(Stereonet):  # pylint: disable=too-many-ancestors
+class EqualArea(EqualAreaProjection, Stereonet):
     '''Equal area stereonet -- preserves areas, but not angles.'''
-
-    @classmethod
-    def line_coordinates(cls, line):
-        return (sqrt(2) * sin(pi/4 - line.plunge/2) * sin(line.trend),
-                sqrt(2) * sin(pi/4 - line.plunge/2) * cos(line.trend))
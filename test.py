@@ -8,9 +8,29 @@ complicated formulae.
 
 import unittest
 import random
-from math import pi
+import os
+import pickle
+import tempfile
+import tkinter
+from itertools import product
+from math import pi, radians
 
-from transformation import DirectionCosines, Plane, Line
+from grouping import DataGroup
+from projections import (GUIDE_TOLERANCE, MAX_CURVE_REFINEMENTS,
+                         MIN_CURVE_SEGMENTS, PROJECTIONS,
+                         EqualAngleProjection, EqualAreaProjection, dip_guide,
+                         flat_coordinates, guide_rotations, latitude_guide)
+from raster import PointRaster
+from render import PNGRenderer, SVGRenderer, parse_colour
+from spatial import (GridIndex, SphericalBinIndex, axial_angle,
+                     distance_to_segment, point_in_polygon)
+from stereonets import (CATCH_UP_DELAY, CREATE_ITEMS_PROC, MOVE_ITEMS_PROC,
+                        RASTER_THRESHOLD, REDRAW_CHUNK_SIZE, ProjectionCache,
+                        RedrawScheduler, create_items, move_items)
+from transformation import (Circle, DirectionCosines, DirectionCosinesArray,
+                            DirectionCosinesSum, OrientationStatistics, Plane,
+                            Line, PlaneArray, LineArray, Rotation,
+                            RotationMatrix)
 
 
 def generate_random_dircoses():
@@ -66,6 +86,30 @@ class TestDirectionCosines(unittest.TestCase):
                     self.assertEqual(one * dircos, dircos)
                     self.assertEqual(dircos / one, dircos)
 
+    def test_sums(self):
+        '''Test that in-place and batched sums match adding vectors.'''
+        expected = self.random_dircoses[0]
+        for dircos in self.random_dircoses[1:]:
+            expected = expected + dircos
+        in_place = DirectionCosinesSum()
+        for dircos in self.random_dircoses:
+            in_place += dircos
+        batched = DirectionCosinesArray.from_direction_cosines(
+            self.random_dircoses).sum()
+        for total in in_place.total(), batched:
+            for actual_comp, expected_comp in zip(total, expected):
+                self.assertAlmostEqual(actual_comp, expected_comp)
+        in_place -= self.random_dircoses[-1]
+        self.assertEqual(in_place.count, len(self.random_dircoses) - 1)
+        for actual_comp, expected_comp in zip(
+                in_place.total(), expected - self.random_dircoses[-1]):
+            self.assertAlmostEqual(actual_comp, expected_comp)
+
+    def test_three_components(self):
+        '''Test that DirectionCosines always have three components.'''
+        self.assertRaises(ValueError, DirectionCosines, (1, 0))
+        self.assertRaises(ValueError, DirectionCosines, (1, 0, 0, 0))
+
 
 class TestPlane(unittest.TestCase):
     '''Test transformation.Plane.'''
@@ -81,6 +125,35 @@ class TestPlane(unittest.TestCase):
             with self.subTest(dircos=dircos):
                 assertAlmostEqualDircos(self, dircos, dircos2plane(dircos))
 
+    def test_rotation_view(self):
+        '''Test that a Plane's rot_axis and base_line describe the plane.'''
+        for dircos in self.random_dircoses:
+            plane = Plane.from_direction_cosines(dircos)
+            with self.subTest(plane=plane):
+                assertAlmostEqualDircos(self, plane.rot_axis, plane.pole())
+                self.assertAlmostEqual(plane.base_line.direction_cosines()
+                                       .dot_product(dircos.normalised()), 0)
+
+    def test_slots(self):
+        '''Test that Planes only store their own fields.'''
+        plane = Plane(1, 1)
+        self.assertIsInstance(plane, Circle)
+        self.assertNotIsInstance(plane, Rotation)
+        self.assertEqual(
+            {name for cls in type(plane).__mro__
+             for name in getattr(cls, '__slots__', ())},
+            {'strike', 'dip', '_dircos'})
+
+    def test_constituent_lines(self):
+        '''Test that the points making up a plane's curve lie on the plane.'''
+        for dircos in self.random_dircoses:
+            plane = Plane.from_direction_cosines(dircos)
+            curve = plane.constituent_direction_cosines(20)
+            self.assertEqual(len(curve), 21)
+            for product in curve.dot_product(dircos.normalised()):
+                with self.subTest(plane=plane):
+                    self.assertAlmostEqual(product, 0)
+
     def test_spanning_parallel(self):
         '''Test that a Plane can't be created from parallel Lines.'''
         for dircos in self.random_dircoses:
@@ -120,6 +193,16 @@ class TestLine(unittest.TestCase):
         assertAlmostEqualDircos(self, Line(0, pi),
                                 Line(0, 0).rotate_around(axis, pi))
 
+    def test_immutable_and_cached(self):
+        '''Test that Lines can't change and cache their direction cosines.'''
+        line = Line(pi/4, pi/3)
+        self.assertIs(line.direction_cosines(), line.direction_cosines())
+        with self.assertRaises(AttributeError):
+            line.plunge = 0
+        unpickled = pickle.loads(pickle.dumps(line))
+        self.assertEqual((unpickled.plunge, unpickled.trend),
+                         (line.plunge, line.trend))
+
     def test_creation(self):
         '''Test creation from DirectionCosines.'''
         assertAlmostEqualDircos(
@@ -142,5 +225,837 @@ class TestLine(unittest.TestCase):
             Line.from_direction_cosines(DirectionCosines((1, 1, 0))))
 
 
+class TestRotationMatrix(unittest.TestCase):
+    '''Test transformation.RotationMatrix.'''
+
+    def setUp(self):
+        # Pregenerate random DirectionCosines to save time on individual tests.
+        self.random_dircoses = generate_random_dircoses()
+        self.lines = [Line.from_direction_cosines(dircos)
+                      for dircos in self.random_dircoses]
+
+    def test_composition(self):
+        '''Test that composed rotations match rotating step by step.'''
+        for axis1, axis2 in zip(self.lines[:10], self.lines[10:20]):
+            angle1, angle2 = random.uniform(-pi, pi), random.uniform(-pi, pi)
+            rot1 = RotationMatrix.around(axis1, angle1)
+            rot2 = RotationMatrix.around(axis2, angle2)
+            composed = rot1.then(rot2)
+            for dircos in self.random_dircoses:
+                with self.subTest(dircos=dircos, axis1=axis1, axis2=axis2):
+                    assertAlmostEqualDircos(self, composed.apply(dircos),
+                                            rot2.apply(rot1.apply(dircos)))
+
+    def test_inverse(self):
+        '''Test that a rotation followed by its inverse does nothing.'''
+        for axis in self.lines[:10]:
+            rotation = RotationMatrix.around(axis, random.uniform(-pi, pi))
+            for dircos in self.random_dircoses:
+                with self.subTest(dircos=dircos, axis=axis):
+                    assertAlmostEqualDircos(
+                        self, dircos,
+                        rotation.inverse().apply(rotation.apply(dircos)))
+
+    def test_batch(self):
+        '''Test that rotating a batch matches rotating single vectors.'''
+        dircos_array = DirectionCosinesArray.from_direction_cosines(
+            self.random_dircoses)
+        for axis in self.lines[:10]:
+            rotation = RotationMatrix.around(axis, random.uniform(-pi, pi))
+            rotated = rotation.apply_array(dircos_array)
+            for dircos, rot_dircos in zip(self.random_dircoses, rotated):
+                with self.subTest(dircos=dircos, axis=axis):
+                    assertAlmostEqualDircos(self, rotation.apply(dircos),
+                                            rot_dircos)
+
+
+class TestLineArray(unittest.TestCase):
+    '''Test transformation.LineArray.'''
+
+    def setUp(self):
+        # Pregenerate random DirectionCosines to save time on individual tests.
+        self.random_dircoses = generate_random_dircoses()
+        self.lines = [Line.from_direction_cosines(dircos)
+                      for dircos in self.random_dircoses]
+
+    def test_conversion(self):
+        '''Test that Lines survive a round trip through a LineArray.'''
+        for line, converted in zip(self.lines,
+                                   LineArray.from_items(self.lines)):
+            with self.subTest(line=line):
+                assertAlmostEqualDircos(self, line, converted)
+
+    def test_dircos(self):
+        '''Test that a LineArray keeps the direction cosines it was created
+        from.'''
+        dircos_array = DirectionCosinesArray.from_direction_cosines(
+            self.random_dircoses)
+        lines = LineArray.from_direction_cosines(dircos_array)
+        for dircos, line in zip(self.random_dircoses, lines):
+            with self.subTest(dircos=dircos):
+                assertAlmostEqualDircos(self, dircos, line)
+        for line, dircos in zip(lines, lines.direction_cosines()):
+            with self.subTest(line=line):
+                assertAlmostEqualDircos(self, line, dircos)
+
+    def test_rotation(self):
+        '''Test that rotating a LineArray matches rotating each Line.'''
+        lines = LineArray.from_items(self.lines)
+        for axis in self.lines[:10]:
+            angle = random.uniform(-2*pi, 2*pi)
+            rotated = lines.rotate_around(axis, angle)
+            for line, rot_line in zip(self.lines, rotated):
+                with self.subTest(line=line, axis=axis, lat=angle):
+                    assertAlmostEqualDircos(
+                        self, line.rotate_around(axis, angle), rot_line)
+
+
+class TestPlaneArray(unittest.TestCase):
+    '''Test transformation.PlaneArray.'''
+
+    def setUp(self):
+        # Pregenerate random DirectionCosines to save time on individual tests.
+        self.random_dircoses = generate_random_dircoses()
+        self.planes = [Plane.from_direction_cosines(dircos)
+                       for dircos in self.random_dircoses]
+
+    def test_pole(self):
+        '''Test that the poles of a PlaneArray match each Plane's pole.'''
+        poles = PlaneArray.from_items(self.planes).pole()
+        for plane, pole in zip(self.planes, poles):
+            with self.subTest(plane=plane):
+                assertAlmostEqualDircos(self, plane.pole(), pole)
+                assertAlmostEqualDircos(self, plane, pole)
+
+    def test_from_direction_cosines(self):
+        '''Test that planes are perpendicular to the given direction
+        cosines.'''
+        planes = PlaneArray.from_direction_cosines(
+            DirectionCosinesArray.from_direction_cosines(self.random_dircoses))
+        for dircos, plane in zip(self.random_dircoses, planes):
+            with self.subTest(dircos=dircos):
+                assertAlmostEqualDircos(self, dircos, plane)
+
+
+class TestProjections(unittest.TestCase):
+    '''Test projections.Projection and its subclasses.'''
+
+    def setUp(self):
+        # Pregenerate random DirectionCosines to save time on individual tests.
+        self.random_dircoses = generate_random_dircoses()
+        self.lines = [Line.from_direction_cosines(dircos)
+                      for dircos in self.random_dircoses]
+        # Include the centre and the rim of the net.
+        self.lines += [Line(pi/2, 0), Line(0, 0), Line(0, pi), Line(0, 3)]
+
+    def test_batched_coordinates(self):
+        '''Test that the batched kernels match line_coordinates.'''
+        dircos_array = DirectionCosinesArray.from_direction_cosines(
+            [line.direction_cosines() for line in self.lines])
+        for projection in PROJECTIONS.values():
+            for math_xs, math_ys in (
+                    projection.lines_coordinates(self.lines),
+                    projection.lines_coordinates(
+                        LineArray.from_items(self.lines)),
+                    projection.direction_cosines_coordinates(dircos_array)):
+                self.assertEqual(len(math_xs), len(self.lines))
+                for line, math_x, math_y in zip(self.lines, math_xs, math_ys):
+                    with self.subTest(projection=projection, line=line):
+                        expected_x, expected_y = \
+                            projection.line_coordinates(line)
+                        self.assertAlmostEqual(math_x, expected_x, delta=1e-15)
+                        self.assertAlmostEqual(math_y, expected_y, delta=1e-15)
+
+    def test_adaptive_sampling(self):
+        '''Test that sampled curves stay within tolerance of the true ones.'''
+        rotations = [Plane(random.uniform(0, 2*pi), random.uniform(0, pi/2))
+                     for _ in range(5)]
+        rotations += [latitude_guide(random.uniform(-pi/2, pi/2)),
+                      dip_guide(pi/2), dip_guide(0)]
+        tolerance = .002
+        for projection, rotation in product(PROJECTIONS.values(), rotations):
+            with self.subTest(projection=projection, rotation=rotation):
+                math_xs, math_ys = projection.adaptive_rotation_coordinates(
+                    rotation, tolerance)
+                self.assertLessEqual(
+                    len(math_xs),
+                    MIN_CURVE_SEGMENTS * 2**MAX_CURVE_REFINEMENTS + 1)
+                segments = list(zip(math_xs, math_ys,
+                                    math_xs[1:], math_ys[1:]))
+                # The bound is only checked at midpoints while sampling, so
+                # allow a little slack between them.
+                for point in zip(*projection.direction_cosines_coordinates(
+                        rotation.constituent_direction_cosines(300))):
+                    self.assertLessEqual(min(
+                        distance_to_segment(*point, *segment)
+                        for segment in segments), 1.05 * tolerance)
+
+    def test_adaptive_sampling_limits(self):
+        '''Test that coarser tolerances need fewer samples, and that
+        refinement stops after MAX_CURVE_REFINEMENTS.'''
+        for projection in PROJECTIONS.values():
+            with self.subTest(projection=projection):
+                coarse, _ = projection.adaptive_rotation_coordinates(
+                    latitude_guide(pi/4), .01)
+                fine, _ = projection.adaptive_rotation_coordinates(
+                    latitude_guide(pi/4), .0001)
+                self.assertLess(len(coarse), len(fine))
+                math_xs, _ = projection.adaptive_rotation_coordinates(
+                    latitude_guide(pi/4), 0)
+                self.assertEqual(
+                    len(math_xs),
+                    MIN_CURVE_SEGMENTS * 2**MAX_CURVE_REFINEMENTS + 1)
+
+    def test_guide_table(self):
+        '''Test that guide tables follow the guides within GUIDE_TOLERANCE.'''
+        spacing = radians(30)
+        for projection in PROJECTIONS.values():
+            table = projection.guide_table(spacing)
+            self.assertIs(projection.guide_table(spacing), table)
+            rotations = guide_rotations(spacing)
+            self.assertEqual(len(table), len(rotations))
+            for rotation, math_coords in zip(rotations, table):
+                with self.subTest(projection=projection, rotation=rotation):
+                    segments = list(zip(math_coords[0::2], math_coords[1::2],
+                                        math_coords[2::2], math_coords[3::2]))
+                    for point in zip(*projection.direction_cosines_coordinates(
+                            rotation.constituent_direction_cosines(100))):
+                        self.assertLessEqual(min(
+                            distance_to_segment(*point, *segment)
+                            for segment in segments), 1.05 * GUIDE_TOLERANCE)
+
+    def test_guide_table_files(self):
+        '''Test that guide tables are saved to and loaded from cache_dir.'''
+        spacing = radians(45)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            for projection in PROJECTIONS.values():
+                # pylint: disable=protected-access
+                projection._guide_tables.pop((projection.projection_name,
+                                              spacing, GUIDE_TOLERANCE), None)
+                table = projection.guide_table(spacing, cache_dir)
+                projection._guide_tables.clear()
+                loaded = projection.guide_table(spacing, cache_dir)
+                self.assertIsNot(loaded, table)
+                self.assertEqual(loaded, table)
+            self.assertEqual(len(os.listdir(cache_dir)), len(PROJECTIONS))
+
+
+class TestOrientationStatistics(unittest.TestCase):
+    '''Test transformation.OrientationStatistics.'''
+
+    def setUp(self):
+        self.cosines = [dircos.normalised()
+                        for dircos in generate_random_dircoses()]
+
+    def test_running_sums(self):
+        '''Test that statistics match sums over all vectors.'''
+        stats = OrientationStatistics(self.cosines[:50])
+        stats.add_array(DirectionCosinesArray.from_direction_cosines(
+            self.cosines[50:]))
+        for dircos in self.cosines[:10]:
+            stats.subtract(dircos)
+        kept = self.cosines[10:]
+        self.assertEqual(stats.count, len(kept))
+        for actual, expected in zip(stats.resultant(), zip(*kept)):
+            self.assertAlmostEqual(actual, sum(expected))
+        tensor = stats.orientation_tensor()
+        for i in range(3):
+            for j in range(3):
+                self.assertAlmostEqual(tensor[i][j], sum(
+                    dircos[i] * dircos[j] for dircos in kept) / len(kept))
+        self.assertAlmostEqual(sum(stats.eigenvalues()), 1)
+        stats.subtract_array(DirectionCosinesArray.from_direction_cosines(
+            kept))
+        self.assertEqual(stats.count, 0)
+        for component in stats.resultant():
+            self.assertAlmostEqual(component, 0, places=12)
+
+    def test_eigenvalues(self):
+        '''Test eigenvalues of clusters and girdles.'''
+        cluster = OrientationStatistics([Line(pi/3, 1).direction_cosines()]
+                                        * 10)
+        for actual, expected in zip(cluster.eigenvalues(), (1, 0, 0)):
+            self.assertAlmostEqual(actual, expected)
+        girdle = OrientationStatistics(
+            Plane(1, 1).constituent_direction_cosines(360)[:-1])
+        for actual, expected in zip(girdle.eigenvalues(), (.5, .5, 0)):
+            self.assertAlmostEqual(actual, expected)
+
+    def test_fisher(self):
+        '''Test Fisher statistics of tight and loose clusters.'''
+        tight = OrientationStatistics([Line(1, 1).direction_cosines()] * 5)
+        self.assertEqual(tight.fisher_kappa(), float('inf'))
+        self.assertAlmostEqual(tight.alpha95(), 0)
+        loose = OrientationStatistics(self.cosines)
+        self.assertLess(loose.fisher_kappa(), tight.fisher_kappa())
+        self.assertGreater(loose.alpha95(), 0)
+        self.assertRaises(ValueError, OrientationStatistics().fisher_kappa)
+
+    def test_mean_direction(self):
+        '''Test mean directions, and that there is none without vectors.'''
+        line = Line(pi/3, 1)
+        stats = OrientationStatistics([line.direction_cosines()] * 3)
+        self.assertAlmostEqual(stats.mean_direction().plunge, line.plunge)
+        self.assertAlmostEqual(stats.mean_direction().trend, line.trend)
+        self.assertRaises(ValueError, OrientationStatistics().mean_direction)
+        for _ in range(3):
+            stats.subtract(line.direction_cosines())
+        self.assertRaises(ValueError, stats.mean_direction)
+        opposite = OrientationStatistics([line.direction_cosines(),
+                                          DirectionCosines(
+                                              -c for c in
+                                              line.direction_cosines())])
+        self.assertRaises(ValueError, opposite.mean_direction)
+
+
+class TestDataGroup(unittest.TestCase):
+    '''Test grouping.DataGroup, which works without Tk.'''
+
+    def setUp(self):
+        self.group = DataGroup('test', Line)
+        self.events = []
+        self.group.bind(
+            add_items=lambda _, netobjs: self.events.append(
+                ('add', list(netobjs))),
+            remove_items=lambda _, netobjs: self.events.append(
+                ('remove', list(netobjs))),
+            change_group_enabled=lambda group: self.events.append(
+                ('enabled', group.enabled.get())))
+        self.lines = [Line(random.uniform(0, pi/2), random.uniform(0, 2*pi))
+                      for _ in range(200)]
+
+    def test_bulk_changes(self):
+        '''Test that bulk changes raise one event each and keep IDs.'''
+        ids = self.group.add_net_objects(self.lines)
+        self.group.remove_net_objects(self.lines[:150])
+        self.assertEqual(self.events, [('add', self.lines),
+                                       ('remove', self.lines[:150])])
+        self.assertEqual(list(self.group.net_objects()), self.lines[150:])
+        self.assertEqual(list(self.group.net_object_ids()), ids[150:])
+        for ident, line in zip(ids[150:], self.lines[150:]):
+            self.assertIs(self.group.net_object(ident), line)
+        self.assertEqual(list(self.group.net_object_array().plunge),
+                         [line.plunge for line in self.lines[150:]])
+
+    def test_failed_changes(self):
+        '''Test that invalid bulk changes change nothing.'''
+        self.group.add_net_objects(self.lines[:10])
+        self.assertRaises(TypeError, self.group.add_net_objects,
+                          self.lines[10:20] + [Plane(0, 0)])
+        self.assertRaises(ValueError, self.group.add_net_objects,
+                          self.lines[5:15])
+        self.assertRaises(ValueError, self.group.remove_net_objects,
+                          self.lines[5:15])
+        self.assertRaises(ValueError, self.group.remove_net_objects_by_id,
+                          [0, 12345])
+        self.assertEqual(list(self.group.net_objects()), self.lines[:10])
+        self.assertEqual(len(self.events), 1)
+        untyped = DataGroup('untyped')
+        self.assertRaises(TypeError, untyped.add_net_objects,
+                          self.lines[:5] + [Plane(0, 0)])
+        self.assertIsNone(untyped.data_type)
+
+    def test_views_are_snapshots(self):
+        '''Test that views don't change with their group.'''
+        self.group.add_net_objects(self.lines[:100])
+        view = self.group.net_objects()
+        self.group.remove_net_object(self.lines[0])
+        self.group.add_net_objects(self.lines[100:])
+        self.assertEqual(list(view), self.lines[:100])
+        self.assertEqual(view[-1], self.lines[99])
+        self.group.replace_all(self.lines[:1])
+        self.assertEqual(list(self.group.net_objects()), self.lines[:1])
+        self.assertEqual(len(view), 100)
+
+    def test_ids_survive_compaction(self):
+        '''Test that IDs stay the same when removals close gaps.'''
+        ids = self.group.add_net_objects(self.lines)
+        for start in range(0, 200, 20):
+            self.group.remove_net_objects(self.lines[start:start + 10])
+        kept = [i for i in range(200) if i % 20 >= 10]
+        new_ids = self.group.add_net_objects(self.lines[:10])
+        self.assertFalse(set(new_ids) & set(ids))
+        self.assertEqual(list(self.group.net_object_ids()),
+                         [ids[i] for i in kept] + new_ids)
+        for i in kept:
+            self.assertIs(self.group.net_object(ids[i]), self.lines[i])
+        self.assertRaises(KeyError, self.group.net_object, ids[0])
+
+    def test_one_event_per_call(self):
+        '''Test that each bulk call raises exactly one event, if valid.'''
+        per_item = []
+        self.group.bind(add_item=lambda _, line: per_item.append(line))
+        self.group.add_net_objects(self.lines[:100])
+        self.group.remove_net_objects(self.lines[:50])
+        self.group.replace_all(self.lines[100:])
+        self.assertEqual(self.events, [('add', self.lines[:100]),
+                                       ('remove', self.lines[:50]),
+                                       ('remove', self.lines[50:100]),
+                                       ('add', self.lines[100:])])
+        self.assertEqual(per_item, self.lines[:100] + self.lines[100:])
+        del self.events[:]
+        self.group.remove_net_objects([])
+        self.assertRaises(TypeError, self.group.replace_all,
+                          self.lines[:5] + [Plane(0, 0)])
+        self.assertEqual(self.events, [])
+        self.assertEqual(list(self.group.net_objects()), self.lines[100:])
+
+    def test_explicit_data_type(self):
+        '''Test that all net objects are checked against a set data type.
+        '''
+        self.assertRaises(TypeError, self.group.add_net_objects,
+                          [Plane(0, 0)] + self.lines[:5])
+        self.assertRaises(TypeError, self.group.add_net_object, Plane(0, 0))
+        self.assertEqual(len(self.group.net_objects()), 0)
+        self.assertEqual(self.events, [])
+        self.assertIs(self.group.data_type, Line)
+
+    def test_removal_keeps_views(self):
+        '''Test that removing net objects doesn't copy viewed storage.'''
+        self.group.add_net_objects(self.lines)
+        before = self.group.net_objects()
+        self.group.remove_net_objects(self.lines[10:20])
+        after = self.group.net_objects()
+        self.group.remove_net_object(self.lines[0])
+        # pylint: disable=protected-access
+        self.assertIs(before._netobjs, after._netobjs)
+        self.assertEqual(list(before), self.lines)
+        self.assertEqual(list(after), self.lines[:10] + self.lines[20:])
+        self.assertEqual(after[:12], self.lines[:10] + self.lines[20:22])
+        self.assertEqual(after[-1], self.lines[-1])
+        self.assertEqual(len(after), 190)
+        self.group.remove_net_objects(self.lines[1:10] + self.lines[20:])
+        self.assertEqual(list(self.group.net_objects()), [])
+        self.assertEqual(len(after), 190)
+
+    def test_statistics(self):
+        '''Test that statistics are kept up to date.'''
+        self.group.add_net_objects(self.lines)
+        self.group.remove_net_objects(self.lines[:100])
+        self.group.remove_net_object(self.lines[100])
+        expected = OrientationStatistics(
+            line.direction_cosines() for line in self.lines[101:])
+        self.assertEqual(self.group.statistics.count, expected.count)
+        for actual, expected in zip(self.group.statistics.resultant(),
+                                    expected.resultant()):
+            self.assertAlmostEqual(actual, expected)
+
+    def test_enabled(self):
+        '''Test that enabling and disabling groups raises events.'''
+        self.group.enabled.set(False)
+        self.group.enabled.set(False)
+        self.group.enabled.set(True)
+        self.assertEqual(self.events, [('enabled', False),
+                                       ('enabled', True)])
+
+
+class TestPointRaster(unittest.TestCase):
+    '''Test raster.PointRaster.'''
+
+    def test_spread_counts(self):
+        '''Test that spread counts match summing each square directly.'''
+        width, height = 13, 9
+        points = PointRaster(width, height)
+        pixels = points.add_points([random.uniform(-1, width + 1)
+                                    for _ in range(100)])
+        self.assertEqual(len(pixels), 50)
+        self.assertEqual(sum(points.counts),
+                         sum(pixel is not None for pixel in pixels))
+        for radius in range(3):
+            spread = points.spread_counts(radius)
+            for row in range(height):
+                for col in range(width):
+                    expected = sum(
+                        points.counts[cur_row * width + cur_col]
+                        for cur_row in range(max(0, row - radius),
+                                             min(height, row + radius + 1))
+                        for cur_col in range(max(0, col - radius),
+                                             min(width, col + radius + 1)))
+                    self.assertEqual(spread[row * width + col], expected)
+
+
+class TestGridIndex(unittest.TestCase):
+    '''Test spatial.GridIndex.'''
+
+    def setUp(self):
+        self.lines = [Line(random.uniform(0, pi/2), random.uniform(0, 2*pi))
+                      for _ in range(500)]
+        # Equal lines must still be told apart.
+        self.lines += [Line(.5, .5) for _ in range(10)]
+        self.planes = [Plane(random.uniform(0, 2*pi), random.uniform(0, pi/2))
+                       for _ in range(20)]
+        self.index = GridIndex(cells=16)
+        project = EqualAreaProjection
+        self.index.add_points(self.lines,
+                              *project.lines_coordinates(self.lines))
+        for plane in self.planes:
+            self.index.add_curve(plane, flat_coordinates(
+                *project.adaptive_rotation_coordinates(plane, .01)))
+        for netobj in self.lines[:50] + self.planes[:5]:
+            self.index.remove(netobj)
+        self.indexed = self.lines[50:] + self.planes[5:]
+
+    def test_nearest(self):
+        '''Test that nearest finds what a full scan finds.'''
+        self.assertEqual(len(self.index), len(self.indexed))
+        for _ in range(200):
+            x, y = random.uniform(-1, 1), random.uniform(-1, 1)
+            max_distance = random.choice((.01, .05, .2))
+            with self.subTest(x=x, y=y, max_distance=max_distance):
+                distances = [self.index.distance(netobj, x, y)
+                             for netobj in self.indexed]
+                found = self.index.nearest(x, y, max_distance)
+                if min(distances) > max_distance:
+                    self.assertIsNone(found)
+                else:
+                    self.assertEqual(self.index.distance(found, x, y),
+                                     min(distances))
+
+    def test_selection(self):
+        '''Test that rectangles and polygons select what a full scan finds.
+        '''
+        def vertices(netobj):
+            if isinstance(netobj, Line):
+                return [EqualAreaProjection.line_coordinates(netobj)]
+            return zip(*EqualAreaProjection.adaptive_rotation_coordinates(
+                netobj, .01))
+        triangle = [(-.8, -.6), (.7, -.2), (-.1, .9)]
+        found = self.index.in_polygon(triangle)
+        self.assertEqual(len(found), len(set(map(id, found))))
+        self.assertEqual(set(map(id, found)), {
+            id(netobj) for netobj in self.indexed
+            if any(point_in_polygon(x, y, triangle)
+                   for x, y in vertices(netobj))})
+        found = self.index.in_rectangle(.3, -.1, -.4, .5)
+        self.assertEqual(set(map(id, found)), {
+            id(netobj) for netobj in self.indexed
+            if any(-.4 <= x <= .3 and -.1 <= y <= .5
+                   for x, y in vertices(netobj))})
+        self.assertEqual(self.index.in_polygon(triangle[:2]), [])
+
+
+class TestSphericalBinIndex(unittest.TestCase):
+    '''Test spatial.SphericalBinIndex.'''
+
+    def setUp(self):
+        self.lines = [Line(random.uniform(0, pi/2), random.uniform(0, 2*pi))
+                      for _ in range(2000)]
+        self.group = DataGroup('test')
+        self.group.add_net_objects(self.lines[:1000])
+        self.index = SphericalBinIndex()
+        self.index.attach(self.group)
+        self.group.add_net_objects(self.lines[1000:])
+        self.group.remove_net_objects(self.lines[:500])
+
+    def angles(self, axis):
+        '''Get angles of all lines in the group from axis, smallest first.'''
+        return sorted(axial_angle(axis.direction_cosines(),
+                                  line.direction_cosines())
+                      for line in self.group.net_objects())
+
+    def test_cone(self):
+        '''Test that cones find the same lines as a full scan, also where
+        they reach round the rim of the net.'''
+        self.assertEqual(len(self.index), 1500)
+        self.assertEqual(sum(self.index.bin_counts().values()), 1500)
+        for axis in Line(0, 1), Line(.05, 4), Line(pi/2, 0), Line(1, 2):
+            for angle in .05, .3, 1:
+                with self.subTest(axis=axis, angle=angle):
+                    found = self.index.cone(axis.direction_cosines(), angle)
+                    expected = [cur for cur in self.angles(axis)
+                                if cur <= angle]
+                    self.assertEqual(len(found), len(expected))
+                    self.assertTrue(set(found) <= set(self.lines[500:]))
+
+    def test_nearest(self):
+        '''Test that the nearest lines are those a full scan finds.'''
+        for axis in Line(0, 5), Line(.7, 1):
+            with self.subTest(axis=axis):
+                found = self.index.nearest(axis.direction_cosines(), 5)
+                self.assertEqual([axial_angle(axis.direction_cosines(),
+                                              line.direction_cosines())
+                                  for line in found], self.angles(axis)[:5])
+
+    def test_detach(self):
+        '''Test that detached groups are forgotten and not followed.'''
+        self.index.detach(self.group)
+        self.group.add_net_object(Line(0, 0))
+        self.assertEqual(len(self.index), 0)
+
+
+class TestCreateItems(unittest.TestCase):
+    '''Test stereonets.create_items, using a fake canvas in plain Tcl.'''
+
+    def test_create_items(self):
+        '''Test that items are created with the right coordinates, options
+        and IDs.'''
+        interpreter = tkinter.Tcl().tk
+        interpreter.eval(CREATE_ITEMS_PROC)
+        interpreter.eval('''
+            set created {}
+            proc fake_canvas {command type args} {
+                global created
+                lappend created [list $command $type {*}$args]
+                return [expr {[llength $created] + 10}]
+            }
+        ''')
+        coords_list = [(i, i + 1, i + 2, i + 3) for i in range(25000)]
+        ids = create_items(interpreter, 'fake_canvas', 'oval', coords_list,
+                           ('-fill', 'red', '-tags', 'a b'))
+        self.assertEqual(ids, list(range(11, 25011)))
+        created = interpreter.splitlist(interpreter.getvar('created'))
+        self.assertEqual(len(created), len(coords_list))
+        self.assertEqual([str(arg) for arg in interpreter.splitlist(
+            created[7])], ['create', 'oval', '7', '8', '9', '10', '-fill',
+                           'red', '-tags', 'a b'])
+
+    def test_move_items(self):
+        '''Test that items get the right coordinates in order.'''
+        interpreter = tkinter.Tcl().tk
+        interpreter.eval(MOVE_ITEMS_PROC)
+        interpreter.eval('''
+            set moved {}
+            proc fake_canvas {command id coords} {
+                global moved
+                lappend moved [list $command $id {*}$coords]
+            }
+        ''')
+        ids = list(range(10, 25010))
+        move_items(interpreter, 'fake_canvas', ids,
+                   [(i, i + .5, i + 1, i + 2) for i in ids])
+        moved = interpreter.splitlist(interpreter.getvar('moved'))
+        self.assertEqual(len(moved), len(ids))
+        self.assertEqual([str(arg) for arg in interpreter.splitlist(
+            moved[12345])], ['coords', '12355', '12355', '12355.5', '12356',
+                             '12357'])
+
+
+class TestProjectionCache(unittest.TestCase):
+    '''Test stereonets.ProjectionCache.'''
+
+    def test_eviction(self):
+        '''Test that the least recently used entries are evicted.'''
+        cache = ProjectionCache(maxsize=3)
+        planes = [Plane(0, 1) for _ in range(4)]
+        for i, plane in enumerate(planes[:3]):
+            cache.put(EqualAreaProjection, plane, i, 'detail')
+        self.assertEqual(cache.get(EqualAreaProjection, planes[0], 'detail'),
+                         0)
+        cache.put(EqualAreaProjection, planes[3], 3, 'detail')
+        self.assertEqual(len(cache), 3)
+        self.assertIsNone(cache.get(EqualAreaProjection, planes[1], 'detail'))
+        for i in 0, 2, 3:
+            self.assertEqual(
+                cache.get(EqualAreaProjection, planes[i], 'detail'), i)
+
+    def test_keys(self):
+        '''Test that equal planes, projections and details don't clash.'''
+        cache = ProjectionCache()
+        plane, equal_plane = Plane(0, 1), Plane(0, 1)
+        cache.put(EqualAreaProjection, plane, 'area', 'detail')
+        cache.put(EqualAngleProjection, plane, 'angle', 'detail')
+        cache.put(EqualAreaProjection, plane, 'other', 'other detail')
+        self.assertIsNone(cache.get(EqualAreaProjection, equal_plane,
+                                    'detail'))
+        self.assertEqual(cache.get(EqualAngleProjection, plane, 'detail'),
+                         'angle')
+        self.assertEqual(cache.get(EqualAreaProjection, plane, 'detail'),
+                         'area')
+
+    def test_invalidate(self):
+        '''Test that invalidating a plane drops all and only its entries.'''
+        cache = ProjectionCache()
+        plane, other_plane = Plane(0, 1), Plane(0, 1)
+        for projection in EqualAreaProjection, EqualAngleProjection:
+            for detail in 1, 2:
+                cache.put(projection, plane, 'coords', detail)
+                cache.put(projection, other_plane, 'other coords', detail)
+        cache.invalidate(plane)
+        self.assertEqual(len(cache), 4)
+        self.assertIsNone(cache.get(EqualAreaProjection, plane, 1))
+        self.assertEqual(cache.get(EqualAngleProjection, other_plane, 2),
+                         'other coords')
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+
+class FakeWidget:
+    '''Records the callbacks that a RedrawScheduler asks Tk to run.'''
+
+    def __init__(self):
+        self.pending = {}
+        self._next_id = 0
+
+    def after(self, delay, function, *args):
+        '''Remember function(*args) to run after delay.'''
+        self._next_id += 1
+        self.pending[self._next_id] = delay, function, args
+        return self._next_id
+
+    def after_idle(self, function, *args):
+        '''Remember function(*args) to run once idle.'''
+        return self.after('idle', function, *args)
+
+    def after_cancel(self, callback_id):
+        '''Forget the given callback.'''
+        del self.pending[callback_id]
+
+    def run(self):
+        '''Run the callbacks pending now, and return their delays.'''
+        pending, self.pending = self.pending, {}
+        for _, function, args in pending.values():
+            function(*args)
+        return [delay for delay, _, _ in pending.values()]
+
+
+class FakeNet:
+    '''Records what a RedrawScheduler plots, like a Stereonet would.'''
+
+    raster_threshold = detail_threshold = RASTER_THRESHOLD
+
+    def __init__(self):
+        self.plotted = []
+
+    def plot_lines(self, lines, **options):
+        '''Record plotting lines.'''
+        self.plotted.append(('lines', len(lines), options))
+
+    def plot_rotations(self, rotations, **options):
+        '''Record plotting rotations.'''
+        self.plotted.append(('rotations', len(rotations), options))
+
+
+class TestRedrawScheduler(unittest.TestCase):
+    '''Test stereonets.RedrawScheduler with fake widgets and nets.'''
+
+    def setUp(self):
+        self.widget, self.progress = FakeWidget(), []
+        # Never run out of time, unless a test says otherwise.
+        self.scheduler = RedrawScheduler(
+            self.widget, max_rate=1e-6,
+            progress=lambda *progress: self.progress.append(progress))
+        self.net, self.hidden_net = FakeNet(), FakeNet()
+        self.lines = [Line(0, 0) for _ in range(REDRAW_CHUNK_SIZE * 3)]
+
+    def test_coalescing(self):
+        '''Test that changes wait for idle time and are merged.'''
+        calls = []
+        for lines in self.lines[:10], self.lines[10:]:
+            self.scheduler.plot(self.net, lines, fill='red')
+        self.scheduler.plot(self.net, [Plane(0, 0)], fill='blue')
+        self.scheduler.call(self.net, calls.append, 'called')
+        self.scheduler.plot(self.net, [Plane(0, 0)], fill='blue')
+        self.assertEqual(len(self.scheduler), len(self.lines) + 2)
+        self.assertEqual(len(self.widget.pending), 1)
+        self.assertEqual(self.net.plotted, [])
+        self.assertEqual(self.widget.run(), ['idle'])
+        self.assertEqual(self.net.plotted, [
+            ('lines', REDRAW_CHUNK_SIZE, {'fill': 'red'})] * 3 + [
+                ('rotations', 1, {'fill': 'blue'})] * 2)
+        self.assertEqual(calls, ['called'])
+        self.assertEqual(len(self.scheduler), 0)
+        self.assertEqual(self.widget.pending, {})
+
+    def test_time_limit(self):
+        '''Test that Tk gets to redraw when changes take too long.'''
+        self.scheduler.max_rate = 1e9
+        self.scheduler.plot(self.net, self.lines)
+        self.widget.run()
+        self.assertEqual(len(self.net.plotted), 1)
+        self.assertEqual(self.widget.run(), [0])
+        self.assertEqual(self.progress[0], (REDRAW_CHUNK_SIZE,
+                                            len(self.lines)))
+        self.scheduler.flush()
+        self.assertEqual(len(self.net.plotted), 3)
+        self.assertEqual(self.widget.pending, {})
+        self.assertEqual(self.progress[-1], (len(self.lines),) * 2)
+
+    def test_large_batches(self):
+        '''Test that only large batches of lines are applied in one step.'''
+        self.scheduler.max_rate = 1e9
+        planes = [Plane(0, 0) for _ in range(RASTER_THRESHOLD)]
+        lines = [Line(0, 0) for _ in range(RASTER_THRESHOLD)]
+        self.scheduler.plot(self.net, planes + lines)
+        self.widget.run()
+        self.assertEqual(self.net.plotted, [('lines', len(lines), {})])
+        total = len(lines) + len(planes)
+        self.assertEqual(self.progress, [(len(lines), total)])
+        for _ in range(3):
+            self.widget.run()
+        self.assertEqual(self.net.plotted[1:], [
+            ('rotations', REDRAW_CHUNK_SIZE, {})] * 3)
+        self.assertEqual(self.progress[-1],
+                         (len(lines) + 3 * REDRAW_CHUNK_SIZE, total))
+
+    def test_hidden_nets(self):
+        '''Test that hidden nets catch up later, or once shown.'''
+        self.scheduler.set_visible(self.hidden_net, False)
+        for net in self.net, self.hidden_net:
+            self.scheduler.plot(net, self.lines)
+        self.widget.run()
+        self.assertEqual(len(self.net.plotted), 3)
+        self.assertEqual(self.hidden_net.plotted, [])
+        # Hidden nets catch up after a delay...
+        self.assertEqual([delay for delay, _, _ in
+                          self.widget.pending.values()], [CATCH_UP_DELAY])
+        self.widget.run()
+        self.assertEqual(len(self.hidden_net.plotted), 3)
+        # ...or as soon as they are shown.
+        self.scheduler.plot(self.hidden_net, self.lines)
+        self.widget.run()
+        self.assertEqual(len(self.hidden_net.plotted), 3)
+        self.scheduler.set_visible(self.hidden_net)
+        self.assertEqual(self.widget.run(), ['idle'])
+        self.assertEqual(len(self.hidden_net.plotted), 6)
+
+    def test_delete_tag(self):
+        '''Test that deleting a tag drops plotting queued under it.'''
+        self.scheduler.set_visible(self.hidden_net, False)
+        self.scheduler.plot(self.hidden_net, self.lines, tags='a')
+        self.scheduler.plot(self.hidden_net, self.lines[:10], tags='b')
+        self.scheduler.delete_tag(self.hidden_net, 'a')
+        self.assertEqual(len(self.scheduler), 10)
+
+
+class TestRenderers(unittest.TestCase):
+    '''Test the headless renderers in render.'''
+
+    def test_parse_colour(self):
+        '''Test that colours are understood like Tk does.'''
+        self.assertEqual(parse_colour('#f80'), (255, 136, 0))
+        self.assertEqual(parse_colour('#0080ff'), (0, 128, 255))
+        self.assertEqual(parse_colour('Dark Green'), (0, 100, 0))
+        self.assertRaises(ValueError, parse_colour, 'no such colour')
+
+    def test_points(self):
+        '''Test that points are drawn with their fill and outline.'''
+        size = 400
+        png = PNGRenderer(size)
+        png.points([100, 50], 'red', 'blue', 1)
+        # pylint: disable=protected-access
+        pixel = lambda x, y: png._rgba[4 * (y * size + x):][:4]
+        self.assertEqual(pixel(100, 50), b'\xff\0\0\xff')
+        self.assertEqual(pixel(100 + png.point_radius, 50), b'\0\0\xff\xff')
+        self.assertEqual(pixel(100 + png.point_radius + 1, 50), b'\xff' * 4)
+        svg = SVGRenderer(size)
+        svg.points([100, 50, 10, 10], 'red', 'blue', 1)
+        self.assertEqual(svg.data().decode().count('<circle '), 2)
+
+    def test_wide_outlines(self):
+        '''Test that outlines wider than points fill them, like in Tk.'''
+        size = 400
+        svg = SVGRenderer(size)
+        svg.points([100, 50], 'red', 'blue', 10)
+        outer_r = svg.point_radius + .5
+        self.assertIn('stroke-width="{:g}"'.format(outer_r),
+                      svg.data().decode())
+        self.assertIn(' r="{:g}"'.format(outer_r / 2), svg.data().decode())
+        png = PNGRenderer(size)
+        png.points([100, 50], 'red', 'blue', 10)
+        # pylint: disable=protected-access
+        self.assertEqual(png._rgba[4 * (50 * size + 100):][:4],
+                         b'\0\0\xff\xff')
+
+
 if __name__ == '__main__':
     unittest.main()
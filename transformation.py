@@ -1,7 +1,18 @@
 '''Basic representations of structural data.'''
 
 import sys
-from math import sqrt, pi, sin, cos, atan, asin, degrees
+from array import array
+from functools import partial
+from operator import mul, truediv, itemgetter
+from math import sqrt, pi, sin, cos, atan, asin, acos, degrees, fsum
+
+# Create tuples (and subclasses) without calling the subclass' __new__.
+_new_tuple = tuple.__new__
+# Set attributes on immutable objects during initialisation.
+_set_attr = object.__setattr__
+
+# OrientationStatistics.alpha95 is the radius of this confidence cone.
+CONFIDENCE_LEVEL = .95
 
 
 def to_int_degrees(rad):
@@ -9,50 +20,75 @@ def to_int_degrees(rad):
     return int(round(degrees(rad)))
 
 
+def _lower_hemisphere(north, east, down):
+    '''Flip the given vector components into the lower hemisphere.'''
+    if -sys.float_info.epsilon < down < 0:
+        # For lower-hemisphere direction cosines, the down component can be
+        # -1e-16; float epsilon (~2.2e-16) should be a sensible limit. E.g.
+        # for Line(0, 0).rotate_around(Line(pi/4, 3*pi/2), pi), which
+        # should be Line(0, pi) but instead would be Line(0, 0) without
+        # this correction.
+        down = 0
+    if down < 0:
+        return -north, -east, -down
+    return north, east, down
+
+
 class DirectionCosines(tuple):
-    '''Represents direction cosines, acting like a cartesian vector.'''
+    '''Represents direction cosines, acting like a cartesian vector.
 
-    @property
-    def north(self):
-        '''North or first coordinate.'''
-        return self[0]
+    There are always exactly three components. Arithmetic is spelled out per
+    component, which is much faster than looping over them.
+    '''
 
-    @property
-    def east(self):
-        '''East or second coordinate.'''
-        return self[1]
+    __slots__ = ()
 
-    @property
-    def down(self):
-        '''Down or third coordinate.'''
-        return self[2]
+    def __new__(cls, components):
+        north, east, down = components
+        return _new_tuple(cls, (north, east, down))
+
+    north = property(itemgetter(0), doc='North or first coordinate.')
+    east = property(itemgetter(1), doc='East or second coordinate.')
+    down = property(itemgetter(2), doc='Down or third coordinate.')
 
     def __add__(self, other):
-        return DirectionCosines(self[i] + comp for i, comp in enumerate(other))
+        s_n, s_e, s_d = self
+        o_n, o_e, o_d = other
+        return _new_tuple(DirectionCosines, (s_n + o_n, s_e + o_e, s_d + o_d))
 
     def __sub__(self, other):
-        return DirectionCosines(self[i] - comp for i, comp in enumerate(other))
+        s_n, s_e, s_d = self
+        o_n, o_e, o_d = other
+        return _new_tuple(DirectionCosines, (s_n - o_n, s_e - o_e, s_d - o_d))
 
     def __mul__(self, other):
         # scalar multiplication, DirectionCosines * scalar
-        return DirectionCosines(comp * other for comp in self)
+        north, east, down = self
+        return _new_tuple(DirectionCosines,
+                          (north * other, east * other, down * other))
     # scalar multiplication, scalar * DirectionCosines
     __rmul__ = __mul__
 
     def __truediv__(self, other):
-        return DirectionCosines(comp / other for comp in self)
+        north, east, down = self
+        return _new_tuple(DirectionCosines,
+                          (north / other, east / other, down / other))
 
     def __floordiv__(self, other):
-        return DirectionCosines(comp // other for comp in self)
+        north, east, down = self
+        return _new_tuple(DirectionCosines,
+                          (north // other, east // other, down // other))
 
     def __neg__(self):
-        return DirectionCosines(-comp for comp in self)
+        north, east, down = self
+        return _new_tuple(DirectionCosines, (-north, -east, -down))
 
     def __pos__(self):
         return self
 
     def __abs__(self):
-        return DirectionCosines(map(abs, self))
+        north, east, down = self
+        return _new_tuple(DirectionCosines, (abs(north), abs(east), abs(down)))
 
     def __int__(self):
         # vector length
@@ -60,22 +96,28 @@ class DirectionCosines(tuple):
 
     def __float__(self):
         # vector length
-        return sqrt(sum(comp**2 for comp in self))
+        north, east, down = self
+        return sqrt(north*north + east*east + down*down)
 
     def cross_product(self, other):
         '''Calculate the vector cross product (self x other).'''
         s_i, s_j, s_k = self
         o_i, o_j, o_k = other
         cross_prod = s_j*o_k - s_k*o_j, s_k*o_i - s_i*o_k, s_i*o_j - s_j*o_i
-        return DirectionCosines(cross_prod)
+        return _new_tuple(DirectionCosines, cross_prod)
 
     def dot_product(self, other):
         '''Calculate the vector dot product (self . other).'''
-        return sum(self[i] * c for i, c in enumerate(other))
+        s_n, s_e, s_d = self
+        o_n, o_e, o_d = other
+        return s_n*o_n + s_e*o_e + s_d*o_d
 
     def normalised(self):
         '''Return DirectionCosines in the same direction, just of length 1.'''
-        return self / float(self)
+        north, east, down = self
+        length = sqrt(north*north + east*east + down*down)
+        return _new_tuple(DirectionCosines,
+                          (north / length, east / length, down / length))
 
     def direction_cosines(self):
         '''For compatibility and ease of use, return self.
@@ -86,20 +128,443 @@ class DirectionCosines(tuple):
         return self
 
 
-class Rotation:
-    '''The plane spanned by one line rotated around an axis.'''
+class DirectionCosinesSum:
+    '''A running sum of DirectionCosines that is updated in place.
 
-    __slots__ = 'rot_axis', 'base_line'
-    FIELDS = __slots__
+    Use this instead of repeatedly adding DirectionCosines, which creates a
+    new tuple for every addition.
+    '''
 
-    def __init__(self, rot_axis, base_line):
-        self.rot_axis = rot_axis
-        self.base_line = base_line
+    __slots__ = 'north', 'east', 'down', 'count'
+
+    def __init__(self, cosines=()):
+        self.north = self.east = self.down = 0.0
+        self.count = 0
+        for dircos in cosines:
+            self.add(dircos)
+
+    def add(self, cosines):
+        '''Add the given DirectionCosines to the sum.'''
+        north, east, down = cosines
+        self.north += north
+        self.east += east
+        self.down += down
+        self.count += 1
+
+    def subtract(self, cosines):
+        '''Subtract the given DirectionCosines from the sum.'''
+        north, east, down = cosines
+        self.north -= north
+        self.east -= east
+        self.down -= down
+        self.count -= 1
+
+    def __iadd__(self, other):
+        self.add(other)
+        return self
+
+    def __isub__(self, other):
+        self.subtract(other)
+        return self
+
+    def total(self):
+        '''Return the current sum as DirectionCosines.'''
+        return _new_tuple(DirectionCosines, (self.north, self.east, self.down))
+
+    def mean(self):
+        '''Return the average of all summed DirectionCosines.'''
+        return self.total() / self.count
+
+    def __repr__(self):
+        return '{}(total={!r}, count={})'.format(
+            type(self).__name__, self.total(), self.count)
+
+
+class DirectionCosinesArray:
+    '''Represents many DirectionCosines, stored column by column.'''
+
+    __slots__ = 'north', 'east', 'down'
+
+    def __init__(self, north=(), east=(), down=()):
+        self.north = array('d', north)
+        self.east = array('d', east)
+        self.down = array('d', down)
+        if not len(self.north) == len(self.east) == len(self.down):
+            raise ValueError('columns must be of equal length')
+
+    @classmethod
+    def from_direction_cosines(cls, cosines):
+        '''Collect an iterable of DirectionCosines into columns.'''
+        return cls(*(tuple(zip(*cosines)) or ((), (), ())))
+
+    def __len__(self):
+        return len(self.north)
+
+    def __iter__(self):
+        return map(partial(_new_tuple, DirectionCosines),
+                   zip(self.north, self.east, self.down))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return type(self)(self.north[index], self.east[index],
+                              self.down[index])
+        return DirectionCosines(
+            (self.north[index], self.east[index], self.down[index]))
+
+    def __neg__(self):
+        return type(self)([-n for n in self.north], [-e for e in self.east],
+                          [-d for d in self.down])
+
+    def sum(self):
+        '''Sum all vectors into a single DirectionCosines.
+
+        This uses math.fsum, which is both fast and accurate.
+        '''
+        return _new_tuple(DirectionCosines, (fsum(self.north), fsum(self.east),
+                                             fsum(self.down)))
+
+    def dot_product(self, other):
+        '''Calculate the dot product of each vector with another vector.'''
+        o_n, o_e, o_d = other
+        return array('d', [n*o_n + e*o_e + d*o_d for n, e, d
+                           in zip(self.north, self.east, self.down)])
+
+    def normalised(self):
+        '''Return a DirectionCosinesArray of the same vectors, of length 1.'''
+        lengths = [sqrt(n*n + e*e + d*d) for n, e, d
+                   in zip(self.north, self.east, self.down)]
+        return type(self)(map(truediv, self.north, lengths),
+                          map(truediv, self.east, lengths),
+                          map(truediv, self.down, lengths))
+
+    def direction_cosines(self):
+        '''For compatibility with Lines and Planes, return self.'''
+        return self
+
+
+class OrientationStatistics:
+    '''Running statistics of many direction cosines, updated in place.
+
+    This keeps the count, the resultant vector and the orientation tensor
+    (sums of products of components), using compensated summation so that
+    adding and subtracting many vectors doesn't accumulate rounding errors.
+    Everything derived from them, like the mean direction, takes O(1) time.
+    '''
+
+    __slots__ = 'count', '_sums', '_errors'
+
+    # Components summed in _sums: the resultant's, then the tensor's.
+    _PRODUCTS = ((0, 0), (0, 1), (0, 2), (1, 1), (1, 2), (2, 2))
+
+    def __init__(self, cosines=()):
+        self.count = 0
+        self._sums, self._errors = [0.0] * 9, [0.0] * 9
+        for dircos in cosines:
+            self.add(dircos)
+
+    def _accumulate(self, values):
+        '''Add values to the sums, in the same order.'''
+        sums, errors = self._sums, self._errors
+        for index, value in enumerate(values):
+            # Neumaier's variant of Kahan summation.
+            total = sums[index]
+            new_total = total + value
+            if abs(total) >= abs(value):
+                errors[index] += (total - new_total) + value
+            else:
+                errors[index] += (value - new_total) + total
+            sums[index] = new_total
+
+    def _update(self, cosines, sign):
+        north, east, down = cosines
+        self._accumulate((sign * north, sign * east, sign * down,
+                          sign * north * north, sign * north * east,
+                          sign * north * down, sign * east * east,
+                          sign * east * down, sign * down * down))
+
+    def add(self, cosines):
+        '''Add the given DirectionCosines to the statistics.'''
+        self._update(cosines, 1)
+        self.count += 1
+
+    def subtract(self, cosines):
+        '''Remove previously added DirectionCosines from the statistics.'''
+        self._update(cosines, -1)
+        self.count -= 1
+
+    def _update_array(self, cosines, sign):
+        columns = cosines.north, cosines.east, cosines.down
+        # math.fsum sums each column exactly, so only the running totals
+        # need compensating.
+        self._accumulate([sign * fsum(column) for column in columns] + [
+            sign * fsum(map(mul, columns[i], columns[j]))
+            for i, j in self._PRODUCTS])
+
+    def add_array(self, cosines):
+        '''Add all vectors of a DirectionCosinesArray at once.'''
+        self._update_array(cosines, 1)
+        self.count += len(cosines)
+
+    def subtract_array(self, cosines):
+        '''Remove all vectors of a DirectionCosinesArray at once.'''
+        self._update_array(cosines, -1)
+        self.count -= len(cosines)
+
+    def _sum(self, index):
+        return self._sums[index] + self._errors[index]
+
+    def resultant(self):
+        '''Return the sum of all vectors as DirectionCosines.'''
+        return _new_tuple(DirectionCosines, map(self._sum, range(3)))
+
+    def resultant_length(self):
+        '''Return the length of the resultant vector, often called R.'''
+        return float(self.resultant())
+
+    def mean_direction(self):
+        '''Return the direction of the resultant vector as a Line.'''
+        if not self.count:
+            raise ValueError('need at least one vector')
+        resultant = self.resultant()
+        if not any(resultant):
+            raise ValueError('the vectors cancel out, so have no mean')
+        return Line.from_direction_cosines(resultant)
+
+    def fisher_kappa(self):
+        '''Estimate the precision parameter of a Fisher distribution.
+
+        Returns infinity if all vectors are parallel.
+        '''
+        if self.count < 2:
+            raise ValueError('need at least two vectors')
+        spread = self.count - self.resultant_length()
+        return (self.count - 1) / spread if spread > 0 else float('inf')
+
+    def alpha95(self):
+        '''Return the radius of the cone of confidence about the mean.
+
+        The true mean direction lies within this angle (in radians) of the
+        mean direction with a probability of CONFIDENCE_LEVEL, assuming a
+        Fisher distribution.
+        '''
+        if self.count < 2:
+            raise ValueError('need at least two vectors')
+        length = self.resultant_length()
+        cos_alpha = 1 - (self.count - length) / length * (
+            (1 - CONFIDENCE_LEVEL) ** (-1 / (self.count - 1)) - 1)
+        return acos(max(-1, min(1, cos_alpha)))
+
+    def orientation_tensor(self):
+        '''Return the orientation tensor, normalised by the count.
+
+        This is a symmetric 3x3 matrix as a tuple of rows; its trace is 1
+        for unit vectors.
+        '''
+        if not self.count:
+            raise ValueError('need at least one vector')
+        rows = [[0.0] * 3 for _ in range(3)]
+        for index, (i, j) in enumerate(self._PRODUCTS, 3):
+            rows[i][j] = rows[j][i] = self._sum(index) / self.count
+        return tuple(map(tuple, rows))
+
+    def eigenvalues(self):
+        '''Return the orientation tensor's eigenvalues, largest first.
+
+        Their ratios describe the shape of the distribution, e.g. clusters
+        have one large eigenvalue and girdles two.
+        '''
+        # Closed-form solution for symmetric 3x3 matrices.
+        (a_nn, a_ne, a_nd), (_, a_ee, a_ed), (_, _, a_dd) = \
+            self.orientation_tensor()
+        off_diagonal = a_ne * a_ne + a_nd * a_nd + a_ed * a_ed
+        mean = (a_nn + a_ee + a_dd) / 3
+        scale = sqrt(((a_nn - mean) ** 2 + (a_ee - mean) ** 2 +
+                      (a_dd - mean) ** 2 + 2 * off_diagonal) / 6)
+        if scale == 0:
+            return mean, mean, mean
+        # Half the determinant of (tensor - mean * I) / scale.
+        b_nn, b_ee, b_dd = ((a - mean) / scale for a in (a_nn, a_ee, a_dd))
+        b_ne, b_nd, b_ed = (a / scale for a in (a_ne, a_nd, a_ed))
+        half_det = (b_nn * (b_ee * b_dd - b_ed * b_ed) -
+                    b_ne * (b_ne * b_dd - b_ed * b_nd) +
+                    b_nd * (b_ne * b_ed - b_ee * b_nd)) / 2
+        angle = acos(max(-1, min(1, half_det))) / 3
+        largest = mean + 2 * scale * cos(angle)
+        smallest = mean + 2 * scale * cos(angle + 2 * pi / 3)
+        return largest, 3 * mean - largest - smallest, smallest
+
+    def __repr__(self):
+        return '{}(resultant={!r}, count={})'.format(
+            type(self).__name__, self.resultant(), self.count)
+
+
+class RotationMatrix:
+    '''A rotation in 3D space, stored as a 3x3 matrix.
+
+    Build a matrix once and apply it to as many DirectionCosines, Lines or
+    arrays of them as needed. Matrices compose with the @ operator, like
+    matrices in mathematical notation: (a @ b) applies b first, then a.
+    '''
+
+    __slots__ = 'rows',
+
+    def __init__(self, rows):
+        self.rows = tuple(tuple(map(float, row)) for row in rows)
+        if len(self.rows) != 3 or any(len(row) != 3 for row in self.rows):
+            raise ValueError('a rotation matrix must be 3x3')
+
+    @classmethod
+    def identity(cls):
+        '''Create a matrix that leaves vectors unchanged.'''
+        return cls(((1, 0, 0), (0, 1, 0), (0, 0, 1)))
+
+    @classmethod
+    def around(cls, axis, lat):
+        '''Create the matrix rotating vectors around axis by the angle lat.'''
+        north, east, down = axis.direction_cosines().normalised()
+        rotcos, rotsin = cos(lat), sin(lat)
+        multiplier = 1 - rotcos
+        return cls(((
+            rotcos + north**2*multiplier,
+            -down*rotsin + north*east*multiplier,
+            east*rotsin + north*down*multiplier,
+        ), (
+            down*rotsin + east*north*multiplier,
+            rotcos + east**2*multiplier,
+            -north*rotsin + east*down*multiplier,
+        ), (
+            -east*rotsin + down*north*multiplier,
+            north*rotsin + down*east*multiplier,
+            rotcos + down**2*multiplier,
+        )))
+
+    def then(self, other):
+        '''Compose rotations: apply self first, followed by other.'''
+        return other @ self
+
+    def inverse(self):
+        '''Return the reverse rotation (i.e. the transposed matrix).'''
+        return RotationMatrix(zip(*self.rows))
+
+    def __matmul__(self, other):
+        columns = tuple(zip(*other.rows))
+        return RotationMatrix(
+            [sum(r * c for r, c in zip(row, col)) for col in columns]
+            for row in self.rows)
+
+    def apply(self, cosines):
+        '''Rotate DirectionCosines, returning DirectionCosines.'''
+        (t00, t01, t02), (t10, t11, t12), (t20, t21, t22) = self.rows
+        north, east, down = cosines
+        return _new_tuple(DirectionCosines, (t00*north + t01*east + t02*down,
+                                             t10*north + t11*east + t12*down,
+                                             t20*north + t21*east + t22*down))
+
+    def apply_array(self, cosines, lower_hemisphere=False):
+        '''Rotate a DirectionCosinesArray, returning a new one.
+
+        If lower_hemisphere is true, rotated vectors pointing upwards are
+        flipped, as they would be when converting them to Lines.
+        '''
+        (t00, t01, t02), (t10, t11, t12), (t20, t21, t22) = self.rows
+        rotated = DirectionCosinesArray()
+        append_north, append_east, append_down = \
+            rotated.north.append, rotated.east.append, rotated.down.append
+        for north, east, down in zip(cosines.north, cosines.east,
+                                     cosines.down):
+            rot_north = t00*north + t01*east + t02*down
+            rot_east = t10*north + t11*east + t12*down
+            rot_down = t20*north + t21*east + t22*down
+            if lower_hemisphere:
+                rot_north, rot_east, rot_down = _lower_hemisphere(
+                    rot_north, rot_east, rot_down)
+            append_north(rot_north)
+            append_east(rot_east)
+            append_down(rot_down)
+        return rotated
+
+    def rotate(self, netobj):
+        '''Rotate a Line, Plane, LineArray or PlaneArray.'''
+        return netobj.rotate_by(self)
+
+    def __eq__(self, other):
+        if not isinstance(other, RotationMatrix):
+            return NotImplemented
+        return self.rows == other.rows
+
+    def __hash__(self):
+        return hash(self.rows)
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self.rows)
+
+
+class _ValueObject:
+    '''Base class for immutable structural data.
+
+    Attributes are set once in __init__ (using _set_attr) and cannot change
+    afterwards, so derived values can be cached on the instance.
+    '''
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError('{} is immutable'.format(type(self).__name__))
+
+    def __delattr__(self, name):
+        raise AttributeError('{} is immutable'.format(type(self).__name__))
+
+    def __reduce__(self):
+        return type(self), tuple(getattr(self, f) for f in self.FIELDS)
+
+
+class Circle(_ValueObject):
+    '''A great or small circle: one line rotated around an axis.
+
+    Subclasses provide rot_axis and base_line, either stored or computed.
+    '''
+
+    __slots__ = ()
 
     def constituent_lines(self, samples=100):
         '''Rotate the base line around the axis incrementally.'''
-        for angle in (i * pi / samples for i in range(samples + 1)):
-            yield self.base_line.rotate_around(self.rot_axis, angle)
+        return iter(LineArray.from_direction_cosines(
+            self.constituent_direction_cosines(samples)))
+
+    def constituent_direction_cosines(self, samples=100):
+        '''Get evenly spaced points on the rotation as DirectionCosinesArray.
+
+        These are the direction cosines of constituent_lines(samples).
+        '''
+        return self.direction_cosines_at([i * pi / samples
+                                          for i in range(samples + 1)])
+
+    def direction_cosines_at(self, angles):
+        '''Rotate the base line by each of the given angles around the axis.
+
+        This uses the closed form of the rotation, splitting the base line
+        into components parallel and perpendicular to the axis, so each point
+        needs only one sine and one cosine. Returns a DirectionCosinesArray
+        flipped into the lower hemisphere.
+        '''
+        axis = self.rot_axis.direction_cosines().normalised()
+        base = self.base_line.direction_cosines()
+        par_n, par_e, par_d = parallel = axis * axis.dot_product(base)
+        perp_n, perp_e, perp_d = base - parallel
+        norm_n, norm_e, norm_d = axis.cross_product(base)
+        cosines = DirectionCosinesArray()
+        append_north, append_east, append_down = \
+            cosines.north.append, cosines.east.append, cosines.down.append
+        for angle in angles:
+            rotcos, rotsin = cos(angle), sin(angle)
+            north, east, down = _lower_hemisphere(
+                par_n + perp_n*rotcos + norm_n*rotsin,
+                par_e + perp_e*rotcos + norm_e*rotsin,
+                par_d + perp_d*rotcos + norm_d*rotsin)
+            append_north(north)
+            append_east(east)
+            append_down(down)
+        return cosines
 
     def __str__(self):
         return '{!s} around {!s}'.format(self.base_line, self.rot_axis)
@@ -112,19 +577,42 @@ class Rotation:
         return hash((self.rot_axis, self.base_line))
 
 
-class Plane(Rotation):
-    '''Represents a plane on a stereonet.'''
+class Rotation(Circle):
+    '''The plane spanned by one line rotated around an axis.'''
 
-    __slots__ = 'strike', 'dip'
+    __slots__ = 'rot_axis', 'base_line'
     FIELDS = __slots__
 
+    def __init__(self, rot_axis, base_line):
+        _set_attr(self, 'rot_axis', rot_axis)
+        _set_attr(self, 'base_line', base_line)
+
+
+class Plane(Circle):
+    '''Represents a plane on a stereonet.'''
+
+    __slots__ = 'strike', 'dip', '_dircos'
+    FIELDS = 'strike', 'dip'
+
     def __init__(self, strike, dip):
         if dip < 0:
             strike += pi
             dip = -dip
         strike %= 2 * pi
-        self.strike, self.dip = strike, dip
-        super().__init__(self.pole(), Line(0, self.strike))
+        _set_attr(self, 'strike', strike)
+        _set_attr(self, 'dip', dip)
+        # Unlike Rotations, rot_axis and base_line are computed when needed,
+        # instead of being stored as two extra Lines per plane.
+
+    @property
+    def rot_axis(self):
+        '''The axis of the plane's Circle, i.e. the pole to the plane.'''
+        return self.pole()
+
+    @property
+    def base_line(self):
+        '''The line rotated to form the plane, i.e. its strike line.'''
+        return Line(0, self.strike)
 
     @classmethod
     def from_direction_cosines(cls, cosines):
@@ -152,15 +640,28 @@ class Plane(Rotation):
         return cls.from_spanning_direction_cosines(dircos1, dircos2)
 
     def direction_cosines(self):
-        '''Returns north, east, down direction cosines of the plane's pole.'''
-        return DirectionCosines((sin(self.dip) * sin(self.strike),
+        '''Returns north, east, down direction cosines of the plane's pole.
+
+        These are only calculated once and cached afterwards.
+        '''
+        try:
+            return self._dircos
+        except AttributeError:
+            dircos = _new_tuple(DirectionCosines,
+                                (sin(self.dip) * sin(self.strike),
                                  -sin(self.dip) * cos(self.strike),
                                  cos(self.dip)))
+            _set_attr(self, '_dircos', dircos)
+            return dircos
 
     def pole(self):
         '''Get the pole (normal vector) to the plane as a Line.'''
         return Line(trend=self.strike - pi/2, plunge=pi/2 - self.dip)
 
+    def rotate_by(self, rotation):
+        '''Returns the plane rotated by the given RotationMatrix.'''
+        return Plane.from_pole(self.pole().rotate_by(rotation))
+
     def _components_in_degrees(self):
         return tuple(map(to_int_degrees, (self.strike, self.dip)))
 
@@ -175,18 +676,19 @@ class Plane(Rotation):
         return hash((self.strike, self.dip))
 
 
-class Line:
+class Line(_ValueObject):
     '''Represents a line on a stereonet.'''
 
-    __slots__ = 'plunge', 'trend'
-    FIELDS = __slots__
+    __slots__ = 'plunge', 'trend', '_dircos'
+    FIELDS = 'plunge', 'trend'
 
     def __init__(self, plunge, trend):
         if plunge < 0:
             trend += pi
             plunge = -plunge
         trend %= 2 * pi
-        self.plunge, self.trend = plunge, trend
+        _set_attr(self, 'plunge', plunge)
+        _set_attr(self, 'trend', trend)
 
     @classmethod
     def from_direction_cosines(cls, cosines):
@@ -200,45 +702,29 @@ class Line:
         return cls(asin(down), trend)
 
     def direction_cosines(self):
-        '''Returns north, east, down direction cosines of the line.'''
-        return DirectionCosines((cos(self.plunge) * cos(self.trend),
+        '''Returns north, east, down direction cosines of the line.
+
+        These are only calculated once and cached afterwards.
+        '''
+        try:
+            return self._dircos
+        except AttributeError:
+            dircos = _new_tuple(DirectionCosines,
+                                (cos(self.plunge) * cos(self.trend),
                                  cos(self.plunge) * sin(self.trend),
                                  sin(self.plunge)))
+            _set_attr(self, '_dircos', dircos)
+            return dircos
 
     def rotate_around(self, axis, lat):
         '''Returns the line rotated around the given axis by the given lat.'''
-        north, east, down = axis.direction_cosines()
-        rotcos, rotsin = cos(lat), sin(lat)
-        multiplier = 1 - rotcos
-        transform = [[
-            rotcos + north**2*multiplier,
-            -down*rotsin + north*east*multiplier,
-            east*rotsin + north*down*multiplier,
-        ], [
-            down*rotsin + east*north*multiplier,
-            rotcos + east**2*multiplier,
-            -north*rotsin + east*down*multiplier,
-        ], [
-            -east*rotsin + down*north*multiplier,
-            north*rotsin + down*east*multiplier,
-            rotcos + down**2*multiplier,
-        ]]
-
-        unrot_cosines = self.direction_cosines()
-        rot_cosines = DirectionCosines(
-            sum(trans_row[j] * unrot for j, unrot in enumerate(unrot_cosines))
-            for trans_row in transform)
-        if -sys.float_info.epsilon < rot_cosines.down < 0:
-            # For lower-hemisphere direction cosines, the down component can be
-            # -1e-16; float epsilon (~2.2e-16) should be a sensible limit. E.g.
-            # for Line(0, 0).rotate_around(Line(pi/4, 3*pi/2), pi), which
-            # should be Line(0, pi) but instead would be Line(0, 0) without
-            # this correction.
-            north, east, _ = rot_cosines
-            rot_cosines = DirectionCosines((north, east, 0))
-        if rot_cosines.down < 0:
-            rot_cosines = -rot_cosines
-        return Line.from_direction_cosines(rot_cosines)
+        return self.rotate_by(RotationMatrix.around(axis, lat))
+
+    def rotate_by(self, rotation):
+        '''Returns the line rotated by the given RotationMatrix.'''
+        rot_cosines = rotation.apply(self.direction_cosines())
+        return Line.from_direction_cosines(
+            _new_tuple(DirectionCosines, _lower_hemisphere(*rot_cosines)))
 
     def _components_in_degrees(self):
         return tuple(map(to_int_degrees, (self.plunge, self.trend)))
@@ -252,3 +738,158 @@ class Line:
 
     def __hash__(self):
         return hash((self.plunge, self.trend))
+
+
+class _MeasurementArray:
+    '''Base class for collections of measurements stored column by column.
+
+    Subclasses define FIELDS, which name the columns in the order that the
+    ITEM_TYPE constructor takes them.
+    '''
+
+    __slots__ = ()
+    FIELDS = ()
+    ITEM_TYPE = None
+
+    @classmethod
+    def _from_columns(cls, *columns):
+        '''Wrap already normalised columns without copying them.'''
+        self = cls.__new__(cls)
+        for field, column in zip(cls.FIELDS, columns):
+            setattr(self, field, column)
+        return self
+
+    @classmethod
+    def from_items(cls, items):
+        '''Collect an iterable of scalar measurements into a new array.'''
+        items = list(items)
+        return cls._from_columns(*(
+            array('d', [getattr(item, field) for item in items])
+            for field in cls.FIELDS))
+
+    def to_items(self):
+        '''Convert the array to a list of scalar measurements.'''
+        return list(self)
+
+    def append(self, item):
+        '''Append a scalar measurement to the array.'''
+        for field in self.FIELDS:
+            getattr(self, field).append(getattr(item, field))
+
+    def __len__(self):
+        return len(getattr(self, self.FIELDS[0]))
+
+    def __iter__(self):
+        # pylint: disable=not-callable
+        return map(self.ITEM_TYPE, *(getattr(self, f) for f in self.FIELDS))
+
+    def __getitem__(self, index):
+        columns = (getattr(self, field)[index] for field in self.FIELDS)
+        if isinstance(index, slice):
+            return self._from_columns(*columns)
+        return self.ITEM_TYPE(*columns)  # pylint: disable=not-callable
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self.to_items())
+
+
+class LineArray(_MeasurementArray):
+    '''Represents many Lines, with plunges and trends in contiguous arrays.'''
+
+    __slots__ = 'plunge', 'trend'
+    FIELDS = __slots__
+    ITEM_TYPE = Line
+
+    def __init__(self, plunge=(), trend=()):
+        plunge, trend = array('d', plunge), array('d', trend)
+        if len(plunge) != len(trend):
+            raise ValueError('columns must be of equal length')
+        # Same normalisation as Line.__init__, but over the whole array.
+        self.trend = array('d', [(t + pi if p < 0 else t) % (2 * pi)
+                                 for p, t in zip(plunge, trend)])
+        self.plunge = array('d', map(abs, plunge))
+
+    @classmethod
+    def from_direction_cosines(cls, cosines):
+        '''Create lines from a DirectionCosinesArray (or anything with
+        north, east and down columns).'''
+        plunge, trend = array('d'), array('d')
+        for north, east, down in zip(cosines.north, cosines.east,
+                                     cosines.down):
+            length = sqrt(north*north + east*east + down*down)
+            north, east, down = north / length, east / length, down / length
+            if north != 0:
+                cur_trend = atan(east / north)
+                if north < 0:
+                    cur_trend += pi
+            else:
+                cur_trend = pi / 2 if east >= 0 else 3 * pi / 2
+            plunge.append(asin(down))
+            trend.append(cur_trend)
+        return cls(plunge, trend)
+
+    def direction_cosines(self):
+        '''Returns north, east, down direction cosines of all lines.'''
+        cos_plunge = array('d', map(cos, self.plunge))
+        return DirectionCosinesArray(
+            map(mul, cos_plunge, map(cos, self.trend)),
+            map(mul, cos_plunge, map(sin, self.trend)),
+            map(sin, self.plunge))
+
+    def rotate_around(self, axis, lat):
+        '''Returns all lines rotated around the given axis by the given lat.'''
+        return self.rotate_by(RotationMatrix.around(axis, lat))
+
+    def rotate_by(self, rotation):
+        '''Returns all lines rotated by the given RotationMatrix.'''
+        return LineArray.from_direction_cosines(rotation.apply_array(
+            self.direction_cosines(), lower_hemisphere=True))
+
+
+class PlaneArray(_MeasurementArray):
+    '''Represents many Planes, with strikes and dips in contiguous arrays.'''
+
+    __slots__ = 'strike', 'dip'
+    FIELDS = __slots__
+    ITEM_TYPE = Plane
+
+    def __init__(self, strike=(), dip=()):
+        strike, dip = array('d', strike), array('d', dip)
+        if len(strike) != len(dip):
+            raise ValueError('columns must be of equal length')
+        # Same normalisation as Plane.__init__, but over the whole array.
+        self.strike = array('d', [(s + pi if d < 0 else s) % (2 * pi)
+                                  for s, d in zip(strike, dip)])
+        self.dip = array('d', map(abs, dip))
+
+    @classmethod
+    def from_direction_cosines(cls, cosines):
+        '''Create planes from the direction cosines of their poles.'''
+        return cls.from_poles(LineArray.from_direction_cosines(cosines))
+
+    @classmethod
+    def from_poles(cls, poles):
+        '''Create planes perpendicular to the lines in a LineArray.'''
+        return cls([trend + pi/2 for trend in poles.trend],
+                   [pi/2 - plunge for plunge in poles.plunge])
+
+    def direction_cosines(self):
+        '''Returns north, east, down direction cosines of the planes' poles.'''
+        sin_dip = array('d', map(sin, self.dip))
+        return DirectionCosinesArray(
+            map(mul, sin_dip, map(sin, self.strike)),
+            [-s * c for s, c in zip(sin_dip, map(cos, self.strike))],
+            map(cos, self.dip))
+
+    def pole(self):
+        '''Get the poles to the planes as a LineArray.'''
+        return LineArray([pi/2 - dip for dip in self.dip],
+                         [strike - pi/2 for strike in self.strike])
+
+    def rotate_around(self, axis, lat):
+        '''Returns all planes rotated around the given axis by lat.'''
+        return self.rotate_by(RotationMatrix.around(axis, lat))
+
+    def rotate_by(self, rotation):
+        '''Returns all planes rotated by the given RotationMatrix.'''
+        return PlaneArray.from_poles(self.pole().rotate_by(rotation))
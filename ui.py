@@ -21,6 +21,32 @@ def chain(*functions, start=None):
 var_to_radians = chain(op.methodcaller('get'), float, radians)
 
 
+def tk_variable(master, observable, variable_type=tk.StringVar):
+    '''Create a Tk variable that is kept in sync with an Observable.
+
+    This binds Tk-free models, e.g. a DataGroup's name, to widgets. The
+    Observable stops updating the variable once master is destroyed.
+    '''
+    variable = variable_type(master, observable.get())
+    def to_observable(*_):
+        try:
+            observable.set(variable.get())
+        except tk.TclError:
+            # Not a valid value of the variable's type (yet), e.g. ''.
+            pass
+    def to_variable(value):
+        if variable.get() != value:
+            variable.set(value)
+    def untrace(event):
+        # Toplevels also get <Destroy> events of their descendants.
+        if str(event.widget) == str(master):
+            observable.untrace(to_variable)
+    variable.trace('w', to_observable)
+    observable.trace(to_variable)
+    master.bind('<Destroy>', untrace, add='+')
+    return variable
+
+
 class ScrollableFrame(ttk.Frame):  # pylint: disable=too-many-ancestors
     '''Tk Frame that is scrollable (by nesting it inside a Canvas).'''
 
@@ -105,12 +131,8 @@ class StyleEditor(tk.Frame):  # pylint: disable=too-many-ancestors
 
     def save(self, *_):
         '''Modify the group with changes made in this dialog.'''
-        self.group.style['fill'] = self._color.get()
-        self.group.style['width'] = self._thickness.get()
-        if self.group.enabled.get():
-            # TODO: Not the most elegant way of doing this.
-            self.group.enabled.set(False)
-            self.group.enabled.set(True)
+        self.group.set_style(fill=self._color.get(),
+                             width=self._thickness.get())
 
 
 class GroupListItem(ttk.Frame):  # pylint: disable=too-many-ancestors
@@ -121,9 +143,10 @@ class GroupListItem(ttk.Frame):  # pylint: disable=too-many-ancestors
         self.columnconfigure(2, weight=1)
         ttk.Radiobutton(self, value=id(group), variable=sel_variable) \
            .grid(row=0, column=0, sticky=tk.NSEW)
-        ttk.Checkbutton(self, variable=group.enabled) \
+        ttk.Checkbutton(self, variable=tk_variable(self, group.enabled,
+                                                   tk.BooleanVar)) \
            .grid(row=0, column=1, sticky=tk.NSEW)
-        ttk.Entry(self, textvariable=group.name) \
+        ttk.Entry(self, textvariable=tk_variable(self, group.name)) \
            .grid(row=0, column=2, sticky=tk.NSEW)
         ttk.Button(self, text='Delete', width=6, command=group.delete) \
            .grid(row=0, column=99, sticky=tk.NSEW)
@@ -145,8 +168,8 @@ class DataDisplay(ttk.Treeview):  # pylint: disable=too-many-ancestors
     def display_data(self, group):
         '''Display the data contained in the given group.'''
         bindings = {
-            'add_item': self._add_group_item,
-            'remove_item': self._remove_group_item,
+            'add_items': self._add_group_items,
+            'remove_items': self._remove_group_items,
             'change_data_type': self._change_group_type,
         }
         if self._group:
@@ -158,20 +181,23 @@ class DataDisplay(ttk.Treeview):  # pylint: disable=too-many-ancestors
         self._change_group_type(self._group)
         if group:
             self._group.bind(**bindings)
-            for item in self._group.net_objects():
-                self._add_group_item(self._group, item)
-
-    def _add_group_item(self, group, netobj):
-        item_values = tuple(int(round(degrees(getattr(netobj, field))))
-                            for field in group.data_type.FIELDS)
-        item_num = len(self.get_children()) + 1
-        tree_item = self.insert('', tk.END, text=item_num, values=item_values)
-        self.see(tree_item)
-        self._netobj_treeitems[netobj] = tree_item
-
-    def _remove_group_item(self, _, netobj):
-        self.delete(self._netobj_treeitems[netobj])
-        del self._netobj_treeitems[netobj]
+            self._add_group_items(self._group, self._group.net_objects())
+
+    def _add_group_items(self, group, netobjs):
+        if not netobjs:
+            return
+        first_num = len(self.get_children()) + 1
+        for item_num, netobj in enumerate(netobjs, first_num):
+            item_values = tuple(int(round(degrees(getattr(netobj, field))))
+                                for field in group.data_type.FIELDS)
+            # Net objects that are equal hash alike, so key them by id().
+            self._netobj_treeitems[id(netobj)] = self.insert(
+                '', tk.END, text=item_num, values=item_values)
+        self.see(self._netobj_treeitems[id(netobjs[-1])])
+
+    def _remove_group_items(self, _, netobjs):
+        self.delete(*(self._netobj_treeitems.pop(id(netobj))
+                      for netobj in netobjs))
         for i, tree_item in enumerate(self.get_children()):
             self.item(tree_item, text=i)
 